@@ -1,24 +1,31 @@
 import logging
+import functools
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, Application, CallbackQueryHandler, MessageHandler, filters
-from telegram.error import BadRequest
-from apscheduler.schedulers.background import BackgroundScheduler
+from telegram.ext import ApplicationBuilder, CommandHandler, ContextTypes, Application, CallbackQueryHandler, MessageHandler, filters, BaseUpdateProcessor
+from telegram.error import BadRequest, RetryAfter, TimedOut
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from dateparser import parse as parse_date
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.executors.asyncio import AsyncIOExecutor
 from datetime import datetime, timedelta
-import pytz
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 import asyncio
 import db
-import dateutil.parser
 import re
+import uuid
+import pickle
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
 from calendar import monthcalendar, month_name
 import calendar
-import notes_bot
 
 logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
+logger = logging.getLogger("remindo.bot")
 
 import config
 
@@ -28,24 +35,56 @@ TOKEN = config.TOKEN  # Bot token from config file
 REMINDER_MAX_RETRIES = config.REMINDER_MAX_RETRIES  # Maximum number of retry attempts
 REMINDER_RETRY_DELAY_BASE = config.REMINDER_RETRY_DELAY_BASE  # Base delay for exponential backoff (2^attempt seconds)
 
-scheduler = BackgroundScheduler(jobstores={
-    'default': SQLAlchemyJobStore(url=config.DATABASE_URL)
-})
-scheduler.start()
-
-db.init_db()
+# Jobs run as coroutines on the bot's event loop; the scheduler is started
+# from the application's post_init hook once that loop is running.
+scheduler = AsyncIOScheduler(
+    jobstores={
+        'default': SQLAlchemyJobStore(
+            url=config.DATABASE_URL,
+            tablename='apscheduler_jobs',
+            pickle_protocol=pickle.HIGHEST_PROTOCOL
+        )
+    },
+    executors={'default': AsyncIOExecutor()},
+    job_defaults={
+        'coalesce': True,  # Collapse fires missed during downtime into one
+        'max_instances': 1,
+        'misfire_grace_time': 3600  # Still deliver reminders up to an hour late
+    }
+)
 
 # Store timezones for both users and groups
 user_timezones = {}  # for private chats: user_id -> tz
 chat_timezones = {}  # for groups: chat_id -> tz
 
-# Global app and loop references used by scheduled jobs (must not be passed as job args)
+# Maximum number of updates handled at the same time (across different chats)
+CONCURRENT_UPDATES = 256
+
+# Chat types that use chat-level timezones and admin checks
+GROUP_CHAT_TYPES = frozenset(("group", "supergroup"))
+
+# Global app reference used by scheduled jobs (must not be passed as job args)
 main_application = None
-main_event_loop = None
+
+@functools.lru_cache(maxsize=10_000)
+def get_timezone_preference(entity_id, entity_type):
+    """Cached db.get_timezone_preference; cleared whenever a timezone is written"""
+    return db.get_timezone_preference(entity_id, entity_type)
+
+UTC = ZoneInfo("UTC")
+
+@functools.lru_cache(maxsize=512)
+def get_tz(name):
+    """Return a cached tzinfo for an IANA name, falling back to UTC if it is unknown"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError, TypeError):
+        return UTC
 
 def load_timezone_preferences():
     """Load timezone preferences from database into memory"""
     global user_timezones, chat_timezones
+    get_timezone_preference.cache_clear()
     preferences = db.load_all_timezone_preferences()
     for entity_id, entity_type, timezone in preferences:
         if entity_type == 'user':
@@ -63,126 +102,49 @@ def get_user_timezone(user_id, chat_type, chat_id):
     # First check user-specific timezone (works in both private and group chats)
     user_tz = user_timezones.get(user_id)
     if user_tz is None:
-        user_tz = db.get_timezone_preference(user_id, 'user')
-        if user_tz != 'Asia/Tashkent':  # Cache only non-defaults
-            user_timezones[user_id] = user_tz
+        user_tz = get_timezone_preference(user_id, 'user')
+        user_timezones[user_id] = user_tz  # Defaults are cached too
 
     # If user has an explicit non-default timezone, prefer it
     if user_tz and user_tz != 'Asia/Tashkent':
         return user_tz
 
     # Otherwise, if in a group/supergroup, try chat timezone next
-    if chat_type in ["group", "supergroup"]:
+    if chat_type in GROUP_CHAT_TYPES:
         chat_tz = chat_timezones.get(chat_id)
         if chat_tz is None:
-            chat_tz = db.get_timezone_preference(chat_id, 'chat')
-            if chat_tz != 'UTC':  # Cache only non-defaults
-                chat_timezones[chat_id] = chat_tz
+            chat_tz = get_timezone_preference(chat_id, 'chat')
+            chat_timezones[chat_id] = chat_tz  # Defaults are cached too
         return chat_tz or 'UTC'
 
     # Private chats fall back to the user's default
     return user_tz or 'Asia/Tashkent'
 
 def get_topic_info_from_message(message):
-    """Get topic information from a message object (for callback queries)"""
+    """Get (topic_id, topic_name) for a message; thread 1 and non-forum chats count as general"""
     chat = message.chat
+    thread_id = getattr(message, 'message_thread_id', None)
+    is_forum = getattr(chat, 'is_forum', None)
     topic_id = None
     topic_name = ""
     
-    # Check if this is a topic message
-    if hasattr(message, 'message_thread_id') and message.message_thread_id:
-        # In forum groups: message_thread_id = 1 is general chat, > 1 are topics
-        # In regular groups: message_thread_id might exist but should be treated as general
-        if chat.id < 0 and hasattr(chat, 'is_forum') and chat.is_forum:
-            if message.message_thread_id == 1:
-                # General chat in forum group
-                topic_id = None
-                topic_name = ""
-            else:
-                # Topic chat in forum group
-                topic_id = message.message_thread_id
-                topic_name = f"Topic #{topic_id}"
-        else:
-            # Regular group chat (not forum)
-            topic_id = None
-            topic_name = ""
+    # In forum groups: message_thread_id = 1 is general chat, > 1 are topics
+    # In regular groups: message_thread_id might exist but should be treated as general
+    if thread_id and thread_id != 1 and chat.id < 0 and is_forum:
+        topic_id = thread_id
+        topic_name = f"Topic #{topic_id}"
     
+    logger.debug("get_topic_info chat=%s type=%s thread=%s forum=%s topic_id=%s",
+                 chat.id, chat.type, thread_id, is_forum, topic_id)
     return topic_id, topic_name
 
-async def get_topic_info(update, context=None):
+def get_topic_info(update, context=None):
     """Get topic information from the update"""
-    chat = update.effective_chat
-    topic_id = None
-    topic_name = ""
-    
-    # Add detailed logging for reminder system
-    logging.info(f"REMINDER get_topic_info - Chat ID: {chat.id}, Chat type: {chat.type}")
-    logging.info(f"REMINDER get_topic_info - Has message_thread_id: {hasattr(update.message, 'message_thread_id')}")
-    logging.info(f"REMINDER get_topic_info - Message thread ID: {getattr(update.message, 'message_thread_id', 'None')}")
-    logging.info(f"REMINDER get_topic_info - Is forum: {getattr(chat, 'is_forum', 'Unknown')}")
-    logging.info(f"REMINDER get_topic_info - Chat ID < 0: {chat.id < 0}")
-    
-    # Check if this is a topic message
-    if hasattr(update.message, 'message_thread_id') and update.message.message_thread_id:
-        # In forum groups: message_thread_id = 1 is general chat, > 1 are topics
-        # In regular groups: message_thread_id might exist but should be treated as general
-        if chat.id < 0 and hasattr(chat, 'is_forum') and chat.is_forum:
-            logging.info(f"REMINDER get_topic_info - Forum group detected")
-            if update.message.message_thread_id == 1 or update.message.message_thread_id is None:
-                # General chat in forum group
-                topic_id = None
-                topic_name = ""
-                logging.info(f"REMINDER get_topic_info - General chat in forum (message_thread_id = {update.message.message_thread_id})")
-            else:
-                # Topic chat in forum group
-                topic_id = update.message.message_thread_id
-                topic_name = f"Topic #{topic_id}"
-                logging.info(f"REMINDER get_topic_info - Topic chat in forum (message_thread_id = {update.message.message_thread_id})")
-        else:
-            # Regular group chat (not forum)
-            topic_id = None
-            topic_name = ""
-            logging.info(f"REMINDER get_topic_info - Regular group chat (not forum)")
-    else:
-        logging.info(f"REMINDER get_topic_info - No message_thread_id attribute or it's None")
-    
-    logging.info(f"REMINDER get_topic_info - Final topic_id: {topic_id}, topic_name: {topic_name}")
-    return topic_id, topic_name
+    return get_topic_info_from_message(update.message)
 
-async def get_topic_info_from_callback(query):
+def get_topic_info_from_callback(query):
     """Get topic information from callback query"""
-    chat = query.message.chat
-    topic_id = None
-    topic_name = ""
-    
-    # Check if this is a topic message
-    if hasattr(query.message, 'message_thread_id') and query.message.message_thread_id:
-        # In forum groups: message_thread_id = 1 is general chat, > 1 are topics
-        # In regular groups: message_thread_id might exist but should be treated as general
-        if chat.id < 0 and hasattr(chat, 'is_forum') and chat.is_forum:
-            if query.message.message_thread_id == 1 or query.message.message_thread_id is None:
-                # General chat in forum group
-                topic_id = None
-                topic_name = ""
-            else:
-                # Topic chat in forum group
-                topic_id = query.message.message_thread_id
-                topic_name = f"Topic #{topic_id}"
-        else:
-            # Regular group chat (not forum)
-            topic_id = None
-            topic_name = ""
-    
-    return topic_id, topic_name
-
-# Load timezone preferences on startup
-load_timezone_preferences()
-
-# Store user context for reminder creation and editing
-user_reminder_context = {}  # user_id -> {date, time, message, step}
-user_edit_context = {}  # user_id -> {reminder_id, field_to_edit}
-
-main_event_loop = None  # Will be set in main
+    return get_topic_info_from_message(query.message)
 
 # Conversation states (not used anymore but kept for compatibility)
 SELECTING_DATE, SELECTING_TIME, ENTERING_MESSAGE, EDITING_REMINDER = range(4)
@@ -238,22 +200,255 @@ UTC_OFFSET_TO_TZ = {
     '+14:00': 'Etc/GMT-14',
 }
 
-WEEKDAYS = [
-    'monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday'
-]
+# Reverse map for displaying a stored IANA timezone as its UTC offset
+TZ_TO_UTC_OFFSET = {tz_name: offset for offset, tz_name in UTC_OFFSET_TO_TZ.items()}
+TZ_TO_UTC_OFFSET['Asia/Tashkent'] = '+05:00'  # Default user timezone (UTC+5)
+
+def build_timezone_keyboard():
+    """Build the /settimezone offset keyboard: 4 columns, cancel at the start of the last row"""
+    offset_keyboard = []
+    row = []
+    for i, offset in enumerate(UTC_OFFSETS):
+        row.append(InlineKeyboardButton(f"{offset}", callback_data=f"setoffset:{offset}"))
+        if (i + 1) % 4 == 0:
+            offset_keyboard.append(row)
+            row = []
+    if row:
+        offset_keyboard.append(row)
+    offset_keyboard[-1].insert(0, InlineKeyboardButton("❌ Cancel", callback_data="timezone_cancel"))
+    return InlineKeyboardMarkup(offset_keyboard)
+
+TIMEZONE_KEYBOARD_MARKUP = build_timezone_keyboard()
+
+# Static menus are built once and shared; Telegram markups are immutable
+REMIND_TYPE_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📅 One-time reminder", callback_data="remind_type:one_time")],
+    [InlineKeyboardButton("🔄 Recurring reminder", callback_data="remind_type:recurring")]
+])
+EDIT_OPTIONS_MARKUP = InlineKeyboardMarkup([
+    [InlineKeyboardButton("✏️ Edit Message", callback_data="edit_message")],
+    [InlineKeyboardButton("⏰ Edit Time", callback_data="edit_time")],
+    [InlineKeyboardButton("❌ Cancel", callback_data="edit_cancel")]
+])
+
+@functools.lru_cache(maxsize=256)
+def list_actions_markup(topic_context, prev_offset=None, next_offset=None):
+    """Edit/delete/close buttons under /list for a topic context ("all", "general" or "topic_<id>"), with page buttons when given offsets"""
+    keyboard = []
+    nav_row = []
+    if prev_offset is not None:
+        nav_row.append(InlineKeyboardButton("◀ Previous", callback_data=f"list_page:{topic_context}:{prev_offset}"))
+    if next_offset is not None:
+        nav_row.append(InlineKeyboardButton("Next ▶", callback_data=f"list_page:{topic_context}:{next_offset}"))
+    if nav_row:
+        keyboard.append(nav_row)
+    keyboard.append([InlineKeyboardButton("✏️ Edit a reminder", callback_data=f"edit_reminder_start:{topic_context}")])
+    keyboard.append([InlineKeyboardButton("🗑️ Delete a reminder", callback_data=f"delete_reminder_start:{topic_context}")])
+    keyboard.append([InlineKeyboardButton("❌ Close", callback_data="close_list")])
+    return InlineKeyboardMarkup(keyboard)
+
+WEEKDAY_ORDER = ('monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday', 'sunday')
+WEEKDAYS = frozenset(WEEKDAY_ORDER)
+WEEKDAY_TITLES = {day: day.title() for day in WEEKDAYS}
+
+# Full weekday names to APScheduler day_of_week abbreviations
+DAY_ABBREVIATIONS = {
+    'monday': 'mon',
+    'tuesday': 'tue',
+    'wednesday': 'wed',
+    'thursday': 'thu',
+    'friday': 'fri',
+    'saturday': 'sat',
+    'sunday': 'sun'
+}
+# Stored day_of_week abbreviations back to full weekday names
+DAY_ABBR_TO_FULL = {abbr: day for day, abbr in DAY_ABBREVIATIONS.items()}
+
+# Weekday selections in the creation and edit flows are a 7-bit mask, bit i set for WEEKDAY_ORDER[i]
+WEEKDAY_BITS = {day: 1 << i for i, day in enumerate(WEEKDAY_ORDER)}
+ALL_WEEKDAYS_MASK = (1 << len(WEEKDAY_ORDER)) - 1
+# Selected weekday names for every mask value, in calendar order
+MASK_WEEKDAYS = tuple(
+    tuple(day for day in WEEKDAY_ORDER if mask & WEEKDAY_BITS[day])
+    for mask in range(ALL_WEEKDAYS_MASK + 1)
+)
+
+def weekday_mask(days):
+    """Bitmask of the weekday names in days; unknown names are ignored"""
+    mask = 0
+    for day in days:
+        mask |= WEEKDAY_BITS.get(day, 0)
+    return mask
+
+@functools.lru_cache(maxsize=64)
+def weekday_days_string(days):
+    """Comma-separated APScheduler abbreviations for a hashable collection of weekday names, in calendar order"""
+    return ','.join(DAY_ABBREVIATIONS[day] for day in WEEKDAY_ORDER if day in days)
+
+def build_weekday_keyboard(selected_days, prefix="", cancel_data="recurring_cancel"):
+    """Weekday picker: Every day, one toggle per weekday (checked when selected), Set Time and Cancel"""
+    keyboard = [[InlineKeyboardButton("Every day", callback_data=f"{prefix}select_all_days")]]
+    for day in WEEKDAY_ORDER:
+        title = WEEKDAY_TITLES[day]
+        label = f"✅ {title}" if day in selected_days else title
+        keyboard.append([InlineKeyboardButton(label, callback_data=f"{prefix}toggle_day:{day}")])
+    keyboard.append([InlineKeyboardButton("⏰ Set Time", callback_data=f"{prefix}set_recurring_time")])
+    keyboard.append([InlineKeyboardButton("Cancel", callback_data=cancel_data)])
+    return InlineKeyboardMarkup(keyboard)
+
+# The no-days and all-days pickers never change, so they are built once
+WEEKDAY_KEYBOARD_MARKUP = build_weekday_keyboard(())
+ALL_WEEKDAYS_KEYBOARD_MARKUP = build_weekday_keyboard(WEEKDAYS)
+EDIT_WEEKDAY_KEYBOARD_MARKUP = build_weekday_keyboard((), "edit_", "edit_cancel")
+EDIT_ALL_WEEKDAYS_KEYBOARD_MARKUP = build_weekday_keyboard(WEEKDAYS, "edit_", "edit_cancel")
+
+def weekday_keyboard_markup(selected_days, edit=False):
+    """Weekday picker for the current selection; markups are immutable, so each selection is built once"""
+    return cached_weekday_keyboard(WEEKDAYS.intersection(selected_days), edit)
+
+@functools.lru_cache(maxsize=256)  # 128 selections for each of the create and edit pickers
+def cached_weekday_keyboard(selected, edit):
+    """Weekday picker for a frozenset of selected days, reusing the prebuilt none/all markups"""
+    if not selected:
+        return EDIT_WEEKDAY_KEYBOARD_MARKUP if edit else WEEKDAY_KEYBOARD_MARKUP
+    if selected == WEEKDAYS:
+        return EDIT_ALL_WEEKDAYS_KEYBOARD_MARKUP if edit else ALL_WEEKDAYS_KEYBOARD_MARKUP
+    if edit:
+        return build_weekday_keyboard(selected, "edit_", "edit_cancel")
+    return build_weekday_keyboard(selected)
+
+# Patterns used when parsing /remind arguments
+DAILY_RE = re.compile(r'^every day at (\d{1,2}:\d{2})(?:\s|$)', re.IGNORECASE)
+WEEKLY_RE = re.compile(r'^every week on (\w+) at (\d{1,2}:\d{2})(?:\s|$)', re.IGNORECASE)
+HHMM_RE = re.compile(r'^\d{1,2}:\d{2}$')
+# Leading hour and minute of a stored "H:MM" / "HH:MM[:SS]" time string
+HOUR_MINUTE_RE = re.compile(r'(\d{1,2}):(\d{2})')
+
+def split_hour_minute(time_str):
+    """Return (hour, minute) ints from an "H:MM" style string"""
+    m = HOUR_MINUTE_RE.match(time_str)
+    if not m:
+        raise ValueError(f"Invalid time string: {time_str!r}")
+    return int(m[1]), int(m[2])
+
+# Typed times like "9:30", "09:30 pm" (the common case for time inputs)
+FAST_TIME_RE = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*(am|pm)?\s*$', re.IGNORECASE)
+# 24-hour "HH:MM" with the hour and minute range checked by the pattern
+CLOCK_TIME_RE = re.compile(r'^\s*([01]?\d|2[0-3]):([0-5]?\d)\s*$')
+# An am/pm marker anywhere in the text ("2:30 pm", "2:30PM", "2:30 p.m.")
+AMPM_RE = re.compile(r'[ap]\.?m', re.IGNORECASE)
+PARSE_SETTINGS = {'PREFER_DATES_FROM': 'future'}
+
+# Steps of the reminder creation and edit flows, shared by the handlers that set and dispatch on them
+STEP_WAITING_FOR_TIME = "waiting_for_time"
+STEP_TIME_SELECTED = "time_selected"
+STEP_SELECTING_DAYS = "selecting_days"
+STEP_RECURRING_TIME_INPUT = "recurring_time_input"
+STEP_RECURRING_TIME_SELECTED = "recurring_time_selected"
+STEP_EDIT_SELECTING_DAYS = "editing_selecting_days"
+STEP_EDIT_RECURRING_TIME_INPUT = "editing_recurring_time_input"
+STEP_EDIT_WAITING_FOR_TIME = "waiting_for_edit_time"
+
+def parse_date(date_string, settings=None):
+    """Parse a free-form date with dateparser, which is only imported on first use"""
+    from dateparser import parse
+    return parse(date_string, settings=settings)
+
+def parse_iso_datetime(value):
+    """Parse a stored ISO timestamp; dateutil is only used for legacy strings fromisoformat rejects"""
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        import dateutil.parser
+        return dateutil.parser.isoparse(value)
+
+def stored_datetime(value):
+    """A reminder's stored time as a datetime; psycopg2 already returns one, older rows hold an ISO string"""
+    return parse_iso_datetime(value) if isinstance(value, str) else value
+
+def stored_hour_minute(remind_time):
+    """(hour, minute) of a recurring reminder's stored time: a datetime, an "HH:MM" string or a legacy ISO timestamp"""
+    if not isinstance(remind_time, str):
+        return remind_time.hour, remind_time.minute
+    time_str = remind_time.strip()
+    m = HOUR_MINUTE_RE.match(time_str)
+    if m:
+        return int(m[1]), int(m[2])
+    parsed = parse_iso_datetime(time_str)
+    return parsed.hour, parsed.minute
+
+def recurring_time_display(remind_time, tz):
+    """HH:MM shown for a recurring reminder; a legacy stored timestamp is converted to tz"""
+    m = HOUR_MINUTE_RE.match(remind_time) if isinstance(remind_time, str) else None
+    if m:
+        return f"{int(m[1]):02d}:{m[2]}"
+    reminder_dt = stored_datetime(remind_time)
+    if reminder_dt.tzinfo is None:
+        reminder_dt = reminder_dt.replace(tzinfo=tz)
+    return reminder_dt.astimezone(tz).strftime("%H:%M")
+
+@functools.lru_cache(maxsize=2048)
+def parse_time_of_day(text):
+    """(hour, minute) dateparser reads from text, or None; only the time of day is kept so results stay valid across days"""
+    parsed = parse_date(text, settings=PARSE_SETTINGS)
+    return (parsed.hour, parsed.minute) if parsed else None
+
+@functools.lru_cache(maxsize=2048)
+def parse_local_datetime(datetime_str, tz_str):
+    """Parse an absolute "YYYY-MM-DD HH:MM" string as an aware time in tz_str, or None if it is not a valid date"""
+    try:
+        return datetime.strptime(datetime_str, "%Y-%m-%d %H:%M").replace(tzinfo=get_tz(tz_str))
+    except ValueError:
+        return None
+
+def parse_time_input(text):
+    """Parse a typed time of day; H:MM and H:MM am/pm are handled without dateparser"""
+    m = FAST_TIME_RE.match(text)
+    if not m:
+        hour_minute = parse_time_of_day(text)
+        if not hour_minute:
+            return None
+        hour, minute = hour_minute
+        return datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+    hour, minute = int(m.group(1)), int(m.group(2))
+    suffix = m.group(3)
+    if suffix:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if suffix.lower() == 'pm' else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return datetime.now().replace(hour=hour, minute=minute, second=0, microsecond=0)
+
+def parse_user_time(text):
+    """Return (hour, minute) for a typed HH:MM or am/pm time, or None"""
+    m = CLOCK_TIME_RE.match(text)
+    if m:
+        return int(m[1]), int(m[2])
+    if AMPM_RE.search(text):
+        parsed_time = parse_time_input(text)
+        if parsed_time:
+            return parsed_time.hour, parsed_time.minute
+    return None
 
 def parse_recurrence(text):
     # every day at HH:MM
-    m = re.match(r'^every day at (\d{1,2}:\d{2})(?:\s|$)', text, re.IGNORECASE)
+    m = DAILY_RE.match(text)
     if m:
         return {'type': 'daily', 'time': m.group(1)}
     # every week on <day> at HH:MM
-    m = re.match(r'^every week on (\w+) at (\d{1,2}:\d{2})(?:\s|$)', text, re.IGNORECASE)
+    m = WEEKLY_RE.match(text)
     if m and m.group(1).lower() in WEEKDAYS:
         return {'type': 'weekly', 'day': m.group(1).lower(), 'time': m.group(2)}
     return None
 
 def create_calendar_keyboard(year, month):
+    """Return the calendar keyboard for the specified month, reusing today's rendering"""
+    return build_calendar_keyboard(year, month, datetime.now().date())
+
+# Cached per (year, month, today) so a new day renders fresh past-date buttons
+@functools.lru_cache(maxsize=64)
+def build_calendar_keyboard(year, month, today):
     """Create calendar keyboard for the specified month"""
     keyboard = []
     
@@ -266,22 +461,26 @@ def create_calendar_keyboard(year, month):
     
     # Calendar days
     cal = monthcalendar(year, month)
-    today = datetime.now().date()
+    
+    # First selectable day of this month; earlier days are in the past
+    if (year, month) < (today.year, today.month):
+        first_open_day = 32
+    elif (year, month) > (today.year, today.month):
+        first_open_day = 1
+    else:
+        first_open_day = today.day
     
     for week in cal:
         row = []
         for day in week:
             if day == 0:
                 row.append(InlineKeyboardButton(" ", callback_data="ignore"))
+            elif day < first_open_day:
+                # Past dates are disabled
+                row.append(InlineKeyboardButton(f"({day})", callback_data="ignore"))
             else:
-                date_obj = datetime(year, month, day).date()
-                if date_obj < today:
-                    # Past dates are disabled
-                    row.append(InlineKeyboardButton(f"({day})", callback_data="ignore"))
-                else:
-                    # Future dates are clickable
-                    date_str = date_obj.strftime("%Y-%m-%d")
-                    row.append(InlineKeyboardButton(str(day), callback_data=f"select_date:{date_str}"))
+                # Future dates are clickable
+                row.append(InlineKeyboardButton(str(day), callback_data=f"select_date:{year:04d}-{month:02d}-{day:02d}"))
         keyboard.append(row)
     
     # Navigation buttons
@@ -294,7 +493,7 @@ def create_calendar_keyboard(year, month):
         prev_year = year - 1
     nav_row.append(InlineKeyboardButton("◀", callback_data=f"calendar:{prev_year}-{prev_month:02d}"))
     
-    nav_row.append(InlineKeyboardButton("Today", callback_data=f"select_date:{today.strftime('%Y-%m-%d')}"))
+    nav_row.append(InlineKeyboardButton("Today", callback_data=f"select_date:{today.year:04d}-{today.month:02d}-{today.day:02d}"))
     
     if month < 12:
         next_month = month + 1
@@ -335,15 +534,82 @@ async def handle_topic_closed_error(update: Update, context: ContextTypes.DEFAUL
     except BadRequest as e:
         if "Topic_closed" in str(e):
             # Topic is closed, can't send any messages - just log it
-            logging.info(f"Topic closed error handled silently - cannot send messages to closed topic")
+            logger.info("Topic closed error handled silently - cannot send messages to closed topic")
         else:
-            logging.error(f"BadRequest in topic closed error handler: {e}")
+            logger.error("BadRequest in topic closed error handler: %s", e)
     except Exception as e:
-        logging.error(f"Failed to send topic closed error message: {e}")
+        logger.error("Failed to send topic closed error message: %s", e)
+
+# Static /start and /help text; only the greeting, admin section and warning vary
+START_TEXT_BODY = (
+    "📝 Reminder Management:\n"
+    "• /remind - Set a new reminder\n"
+    "• /list - View reminders in current topic\n"
+    "• /list all - View all reminders in this group\n"
+    "• /delete <id> - Delete a specific reminder\n"
+    "• /edit <id> - Edit an existing reminder\n\n"
+    "📋 Note Taking (Supergroups Only):\n"
+    "• /note - Save a message as a note (reply to message)\n"
+    "• /notes - View notes in current topic\n"
+    "• /notes all - View all notes in this group\n"
+    "• /deletenote <id> - Delete a specific note\n"
+    "• /editnote <id> - Edit a note's title\n\n"
+    "⚙️ Settings:\n"
+    "• /settimezone - Set timezone (admin only in groups)\n\n"
+)
+
+START_TEXT_ADMIN = (
+    "👑 Admin Commands:\n"
+    "• /adminlist - View all reminders in group\n"
+    "• /admindelete <id> - Delete any reminder in group\n\n"
+)
+
+START_TEXT_FOOTER = (
+    "Example: /remind 9:00 Take medicine\n\n"
+    "💡 Topic Support: Reminders are automatically organized by topics in forum groups!"
+)
+
+HELP_TEXT_BODY = """
+🤖 Remindo Bot Help
+
+📝 Reminder Management:
+• /remind <time> <message> — Set a new reminder
+  Example: /remind 9:00 Take medicine
+• /list — View reminders in current topic
+• /list all — View all reminders in this group
+• /delete <id> — Delete a specific reminder
+• /edit <id> — Edit an existing reminder
+
+📋 Note Taking (Supergroups Only):
+• /note — Save a message as a note (reply to message)
+• /note <title> — Save with a title
+• /note <text> — Create a new note
+• /notes — View notes in current topic
+• /notes all — View all notes in this group
+• /deletenote <id> — Delete a specific note
+• /editnote <id> — Edit a note's title
+
+⚙️ Settings:
+• /settimezone — Set timezone (admin only in groups)"""
+
+HELP_TEXT_ADMIN_SECTION = """
+
+👑 Admin Commands:
+• /adminlist — View all reminders in group
+• /adminlist all — View all reminders from all topics
+• /admindelete <id> — Delete any reminder in group"""
+
+HELP_TEXT_FOOTER = """
+
+For help or feedback, contact: @Type2Alibek_bot
+        """
+
+HELP_TEXT_USER = HELP_TEXT_BODY + HELP_TEXT_FOOTER
+HELP_TEXT_ADMIN = HELP_TEXT_BODY + HELP_TEXT_ADMIN_SECTION + HELP_TEXT_FOOTER
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
-        topic_id, topic_name = await get_topic_info(update, context)
+        topic_id, topic_name = get_topic_info(update, context)
         topic_info = f" in {topic_name}" if topic_id else ""
         
         # Check if user has set a timezone
@@ -359,30 +625,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Check if user is admin to show admin commands
         is_admin = await check_admin_permissions(update, context)
         
-        start_text = f"Hello! I am your reminder bot{topic_info}. Here are the available commands:\n\n"
-        start_text += "📝 Reminder Management:\n"
-        start_text += "• /remind - Set a new reminder\n"
-        start_text += "• /list - View reminders in current topic\n"
-        start_text += "• /list all - View all reminders in this group\n"
-        start_text += "• /delete <id> - Delete a specific reminder\n"
-        start_text += "• /edit <id> - Edit an existing reminder\n\n"
-        start_text += "📋 Note Taking (Supergroups Only):\n"
-        start_text += "• /note - Save a message as a note (reply to message)\n"
-        start_text += "• /notes - View notes in current topic\n"
-        start_text += "• /notes all - View all notes in this group\n"
-        start_text += "• /deletenote <id> - Delete a specific note\n"
-        start_text += "• /editnote <id> - Edit a note's title\n\n"
-        start_text += "⚙️ Settings:\n"
-        start_text += "• /settimezone - Set timezone (admin only in groups)\n\n"
-        
+        parts = [f"Hello! I am your reminder bot{topic_info}. Here are the available commands:\n\n", START_TEXT_BODY]
         if is_admin:
-            start_text += "👑 Admin Commands:\n"
-            start_text += "• /adminlist - View all reminders in group\n"
-            start_text += "• /admindelete <id> - Delete any reminder in group\n\n"
-        
-        start_text += "Example: /remind 9:00 Take medicine\n\n"
-        start_text += "💡 Topic Support: Reminders are automatically organized by topics in forum groups!"
-        start_text += f"{timezone_warning}"
+            parts.append(START_TEXT_ADMIN)
+        parts.append(START_TEXT_FOOTER)
+        parts.append(timezone_warning)
+        start_text = "".join(parts)
         
         await update.message.reply_text(start_text)
     except BadRequest as e:
@@ -396,41 +644,7 @@ async def help_command(update, context):
         # Check if user is admin to show admin commands
         is_admin = await check_admin_permissions(update, context)
         
-        help_text = """
-🤖 Remindo Bot Help
-
-📝 Reminder Management:
-• /remind <time> <message> — Set a new reminder
-  Example: /remind 9:00 Take medicine
-• /list — View reminders in current topic
-• /list all — View all reminders in this group
-• /delete <id> — Delete a specific reminder
-• /edit <id> — Edit an existing reminder
-
-📋 Note Taking (Supergroups Only):
-• /note — Save a message as a note (reply to message)
-• /note <title> — Save with a title
-• /note <text> — Create a new note
-• /notes — View notes in current topic
-• /notes all — View all notes in this group
-• /deletenote <id> — Delete a specific note
-• /editnote <id> — Edit a note's title
-
-⚙️ Settings:
-• /settimezone — Set timezone (admin only in groups)"""
-        
-        if is_admin:
-            help_text += """
-
-👑 Admin Commands:
-• /adminlist — View all reminders in group
-• /adminlist all — View all reminders from all topics
-• /admindelete <id> — Delete any reminder in group"""
-        
-        help_text += """
-
-For help or feedback, contact: @Type2Alibek_bot
-        """
+        help_text = HELP_TEXT_ADMIN if is_admin else HELP_TEXT_USER
         
         await update.message.reply_text(help_text)
     except BadRequest as e:
@@ -472,38 +686,7 @@ async def settimezone(update: Update, context: ContextTypes.DEFAULT_TYPE):
     current_tz = get_user_timezone(user_id, chat.type, chat.id)
     
     # Convert IANA timezone to UTC offset for display
-    current_tz_display = current_tz
-    for offset, tz_name in UTC_OFFSET_TO_TZ.items():
-        if tz_name == current_tz:
-            current_tz_display = offset
-            break
-    
-    # Special handling for Asia/Tashkent (UTC+5)
-    if current_tz == 'Asia/Tashkent':
-        current_tz_display = '+05:00'
-    
-    # Table layout: 4 columns per row, only offset as label
-    offset_keyboard = []
-    row = []
-    for i, offset in enumerate(UTC_OFFSETS):
-        btn = InlineKeyboardButton(f"{offset}", callback_data=f"setoffset:{offset}")
-        row.append(btn)
-        if (i + 1) % 4 == 0:
-            offset_keyboard.append(row)
-            row = []
-    if row:
-        offset_keyboard.append(row)
-    
-    # Add cancel button at the bottom of the first column
-    # Find the last row and add cancel button to the first position
-    if offset_keyboard:
-        # Add cancel button to the first position of the last row
-        offset_keyboard[-1].insert(0, InlineKeyboardButton("❌ Cancel", callback_data="timezone_cancel"))
-    else:
-        # If no rows exist, create a new row with just the cancel button
-        offset_keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="timezone_cancel")])
-    
-    reply_markup = InlineKeyboardMarkup(offset_keyboard)
+    current_tz_display = TZ_TO_UTC_OFFSET.get(current_tz, current_tz)
     
     try:
         await update.message.reply_text(
@@ -511,7 +694,7 @@ async def settimezone(update: Update, context: ContextTypes.DEFAULT_TYPE):
             f"Please select your timezone (UTC offset):\n"
             f"If you don't know your offset, see: https://en.wikipedia.org/wiki/List_of_UTC_time_offsets\n"
             f"(This will set your personal timezone for all chats.)",
-            reply_markup=reply_markup
+            reply_markup=TIMEZONE_KEYBOARD_MARKUP
         )
     except BadRequest as e:
         if "Topic_closed" in str(e):
@@ -537,10 +720,11 @@ async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE):
     # Check if user has set a custom timezone
     user_id = update.message.from_user.id
     chat = update.effective_chat
-    current_tz = get_user_timezone(user_id, chat.type, chat.id)
+    tz_str = get_user_timezone(user_id, chat.type, chat.id)
     
     # Check if user has explicitly set a timezone in database
-    db_tz = db.get_timezone_preference(user_id, 'user')
+    # (get_user_timezone has already cached the user's own preference)
+    db_tz = user_timezones[user_id]
     timezone_warning = ""
     if db_tz == 'Asia/Tashkent':  # User hasn't explicitly set a timezone (UTC+5)
         if chat.type == "private":
@@ -550,11 +734,7 @@ async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE):
     
     if not context.args:
         # Show buttons for reminder types
-        keyboard = [
-            [InlineKeyboardButton("📅 One-time reminder", callback_data="remind_type:one_time")],
-            [InlineKeyboardButton("🔄 Recurring reminder", callback_data="remind_type:recurring")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        reply_markup = REMIND_TYPE_MARKUP
         try:
             await update.message.reply_text(
                 f"Choose reminder type:{timezone_warning}",
@@ -581,46 +761,35 @@ async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     rest = command_and_rest[1]
     recurrence = parse_recurrence(rest)
-    chat = update.effective_chat
-    topic_id, topic_name = await get_topic_info(update, context)
-    tz_str = get_user_timezone(update.message.from_user.id, chat.type, chat.id)
-    try:
-        tz = pytz.timezone(tz_str)
-    except Exception:
-        tz = pytz.UTC
+    topic_id, topic_name = get_topic_info(update, context)
+    tz = get_tz(tz_str)
     if recurrence:
         # Recurring reminder
         if recurrence['type'] == 'daily':
             time_str = recurrence['time']
             message = rest.split(time_str, 1)[1].strip()
-            hour, minute = map(int, time_str.split(':'))
-            reminder_id = db.add_reminder(update.message.from_user.id, chat.id, message, time_str, tz_str, is_recurring=True, recurrence_type='daily', topic_id=topic_id)
-            job = scheduler.add_job(
-                schedule_reminder,
-                'cron',
-                hour=hour, minute=minute, timezone=tz,
-                args=[chat.id, message, None, reminder_id, topic_id]
-            )
-            # Store the job ID
-            db.update_reminder(reminder_id, update.message.from_user.id, job_id=job.id)
+            hour, minute = split_hour_minute(time_str)
+            job_id = uuid.uuid4().hex
+            reminder_id = await asyncio.to_thread(db.add_reminder, update.message.from_user.id, chat.id, message, time_str, tz_str, is_recurring=True, recurrence_type='daily', topic_id=topic_id, job_id=job_id)
+            invalidate_user_reminders(chat.id)
+            if not await schedule_new_reminder(reminder_id, update.message.from_user.id, recurring_job_specs(reminder_id, chat.id, message, hour, minute, tz, topic_id, 'daily', job_id=job_id)):
+                await update.message.reply_text("Failed to schedule reminder. Please try again later.")
+                return
             topic_info = f" in {topic_name}" if topic_id else ""
             await update.message.reply_text(f"Daily recurring reminder set for {time_str} ({tz_str}){topic_info}! Message: {message}")
         elif recurrence['type'] == 'weekly':
             day = recurrence['day']
             time_str = recurrence['time']
             message = rest.split(time_str, 1)[1].strip()
-            hour, minute = map(int, time_str.split(':'))
-            reminder_id = db.add_reminder(update.message.from_user.id, chat.id, message, time_str, tz_str, is_recurring=True, recurrence_type='weekly', day_of_week=day, topic_id=topic_id)
-            job = scheduler.add_job(
-                schedule_reminder,
-                'cron',
-                day_of_week=day, hour=hour, minute=minute, timezone=tz,
-                args=[chat.id, message, None, reminder_id, topic_id]
-            )
-            # Store the job ID
-            db.update_reminder(reminder_id, update.message.from_user.id, job_id=job.id)
+            hour, minute = split_hour_minute(time_str)
+            job_id = uuid.uuid4().hex
+            reminder_id = await asyncio.to_thread(db.add_reminder, update.message.from_user.id, chat.id, message, time_str, tz_str, is_recurring=True, recurrence_type='weekly', day_of_week=day, topic_id=topic_id, job_id=job_id)
+            invalidate_user_reminders(chat.id)
+            if not await schedule_new_reminder(reminder_id, update.message.from_user.id, recurring_job_specs(reminder_id, chat.id, message, hour, minute, tz, topic_id, 'weekly', day, job_id)):
+                await update.message.reply_text("Failed to schedule reminder. Please try again later.")
+                return
             topic_info = f" in {topic_name}" if topic_id else ""
-            await update.message.reply_text(f"Weekly recurring reminder set for {day.title()} at {time_str} ({tz_str}){topic_info}! Message: {message}")
+            await update.message.reply_text(f"Weekly recurring reminder set for {WEEKDAY_TITLES[day]} at {time_str} ({tz_str}){topic_info}! Message: {message}")
         return
     
     # One-time reminder (existing logic)
@@ -632,856 +801,543 @@ async def remind(update: Update, context: ContextTypes.DEFAULT_TYPE):
     reminder_msg = command_and_time[2]
     now = datetime.now(tz)
     
-    # Try to parse the time string
-    reminder_time = parse_date(time_str, settings={'PREFER_DATES_FROM': 'future', 'TIMEZONE': tz_str, 'RETURN_AS_TIMEZONE_AWARE': True})
-    
-    if not reminder_time:
-        await update.message.reply_text("Could not understand the time. Please try again.")
-        logging.warning(f"User {update.message.from_user.id} provided invalid time string: {time_str}")
-        return
-    
-    if reminder_time.tzinfo is None:
-        reminder_time = tz.localize(reminder_time)
-    
-    # If the parsed time is in the past, try to interpret it as tomorrow
-    if reminder_time < now:
-        # Check if the input was just a time (HH:MM format) and if it's actually in the past
-        if re.match(r'^\d{1,2}:\d{2}$', time_str):
-            # Parse just the time part
-            try:
-                hour, minute = map(int, time_str.split(':'))
-                
-                # Check if this time has already passed today
-                today_at_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                if today_at_time.tzinfo is None:
-                    today_at_time = tz.localize(today_at_time)
-                
-                if today_at_time < now:
-                    # Time has passed today, set it for tomorrow
-                    tomorrow = now + timedelta(days=1)
-                    reminder_time = tomorrow.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                    if reminder_time.tzinfo is None:
-                        reminder_time = tz.localize(reminder_time)
-                else:
-                    # Time hasn't passed today, use today's time
-                    reminder_time = today_at_time
-                    
-            except ValueError:
-                await update.message.reply_text("Invalid time format. Please use HH:MM format.")
-                return
-        else:
+    if HHMM_RE.match(time_str):
+        # Plain HH:MM: today at that time, or tomorrow if it has already passed
+        try:
+            hour, minute = split_hour_minute(time_str)
+            reminder_time = now.replace(hour=hour, minute=minute, second=0, microsecond=0)
+        except ValueError:
+            await update.message.reply_text("Invalid time format. Please use HH:MM format.")
+            return
+        if reminder_time < now:
+            tomorrow = now + timedelta(days=1)
+            reminder_time = tomorrow.replace(hour=hour, minute=minute, second=0, microsecond=0)
+    else:
+        # Anything else goes through dateparser
+        reminder_time = parse_date(time_str, settings={'PREFER_DATES_FROM': 'future', 'TIMEZONE': tz_str, 'RETURN_AS_TIMEZONE_AWARE': True})
+        
+        if not reminder_time:
+            await update.message.reply_text("Could not understand the time. Please try again.")
+            logger.warning("User %s provided invalid time string: %s", update.message.from_user.id, time_str)
+            return
+        
+        if reminder_time.tzinfo is None:
+            reminder_time = reminder_time.replace(tzinfo=tz)
+        
+        if reminder_time < now:
             await update.message.reply_text("The time is in the past. Please try again.")
-            logging.warning(f"User {update.message.from_user.id} tried to set reminder in the past: {reminder_time}")
+            logger.warning("User %s tried to set reminder in the past: %s", update.message.from_user.id, reminder_time)
             return
     chat_id = chat.id
-    reminder_id = db.add_reminder(update.message.from_user.id, chat_id, reminder_msg, reminder_time.isoformat(), tz_str, topic_id=topic_id)
-    try:
-        job = scheduler.add_job(schedule_reminder, 'date', run_date=reminder_time, args=[chat_id, reminder_msg, reminder_time, reminder_id, topic_id])
-        # Store the job ID
-        db.update_reminder(reminder_id, update.message.from_user.id, job_id=job.id)
-        topic_info = f" in {topic_name}" if topic_id else ""
-        await update.message.reply_text(f"Reminder set for {reminder_time.strftime('%Y-%m-%d %H:%M:%S %Z')}{topic_info}! Message: {reminder_msg}")
-        logging.info(f"Scheduled reminder for chat_id={chat_id} topic_id={topic_id} at {reminder_time} with message: {reminder_msg}")
-    except Exception as e:
+    # Job id is generated up front so the reminder row is written once, with it
+    job_id = uuid.uuid4().hex
+    reminder_id = await asyncio.to_thread(db.add_reminder, update.message.from_user.id, chat_id, reminder_msg, reminder_time.isoformat(), tz_str, topic_id=topic_id, job_id=job_id)
+    invalidate_user_reminders(chat_id)
+    if not await schedule_new_reminder(reminder_id, update.message.from_user.id, [('date', {'id': job_id, 'run_date': reminder_time}, (chat_id, reminder_msg, reminder_time, reminder_id, topic_id))]):
         await update.message.reply_text("Failed to schedule reminder. Please try again later.")
-        logging.error(f"Failed to add job to scheduler for chat_id={chat_id}: {e}")
+        return
+    topic_info = f" in {topic_name}" if topic_id else ""
+    await update.message.reply_text(f"Reminder set for {reminder_time.strftime('%Y-%m-%d %H:%M:%S %Z')}{topic_info}! Message: {reminder_msg}")
+    logger.info("Scheduled reminder for chat_id=%s topic_id=%s at %s with message: %s", chat_id, topic_id, reminder_time, reminder_msg)
     return
 
+# Rows behind the edit/delete pickers, reused for a few seconds so that reopening a
+# picker does not query again; any write in a chat drops that chat's entries
+REMINDERS_CACHE_TTL = 10
+reminders_cache = {}  # chat_id -> {(user_id, topic_id): (fetched_at, rows)}
+
+async def get_user_reminders_cached(user_id, chat_id, topic_id=None):
+    """db.get_user_reminders, reusing rows fetched within the last REMINDERS_CACHE_TTL seconds"""
+    chat_entries = reminders_cache.setdefault(chat_id, {})
+    key = (user_id, topic_id)
+    now = time.monotonic()
+    cached = chat_entries.get(key)
+    if cached and now - cached[0] < REMINDERS_CACHE_TTL:
+        return cached[1]
+    rows = await asyncio.to_thread(db.get_user_reminders, user_id, chat_id, topic_id)
+    chat_entries[key] = (now, rows)
+    return rows
+
+def invalidate_user_reminders(chat_id):
+    """Forget cached reminder rows for a chat after a reminder in it was created, edited or deleted"""
+    reminders_cache.pop(chat_id, None)
+
+# Display names of chat members for the admin views, kept for USER_NAME_TTL seconds
+USER_NAME_TTL = 600
+user_name_cache = {}  # (chat_id, user_id) -> (fetched_at, name)
+
+async def resolve_user_name(bot, chat_id, user_id):
+    """First name or username of a chat member, or "User <id>" when the lookup fails"""
+    key = (chat_id, user_id)
+    now = time.monotonic()
+    cached = user_name_cache.get(key)
+    if cached and now - cached[0] < USER_NAME_TTL:
+        return cached[1]
+    try:
+        member = await bot.get_chat_member(chat_id, user_id)
+    except Exception:
+        return f"User {user_id}"
+    name = member.user.first_name or member.user.username or f"User {user_id}"
+    user_name_cache[key] = (now, name)
+    return name
+
+async def resolve_user_names(bot, chat_id, user_ids):
+    """Display names for the distinct user_ids, looked up concurrently"""
+    unique_ids = list(dict.fromkeys(user_ids))
+    names = await asyncio.gather(*(resolve_user_name(bot, chat_id, user_id) for user_id in unique_ids))
+    return dict(zip(unique_ids, names))
+
+def expire_user_names():
+    """Drop cached member names older than USER_NAME_TTL"""
+    cutoff = time.monotonic() - USER_NAME_TTL
+    for key in [key for key, (fetched_at, _) in user_name_cache.items() if fetched_at < cutoff]:
+        del user_name_cache[key]
+
 async def transition_to_time_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Helper function to transition to time input state"""
-    user_id = update.message.from_user.id
-    if user_id in user_reminder_context:
-        user_reminder_context[user_id]["step"] = "waiting_for_time"
+    reminder_context = context.user_data.get("reminder")
+    if reminder_context:
+        reminder_context["step"] = STEP_WAITING_FOR_TIME
         return SELECTING_TIME
     return
 
-async def handle_reminder_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Handle text input for reminder creation and editing"""
+# Scheduler mutations from the edit flow are queued and applied in batches by
+# scheduler_worker, off the event loop (the job store does blocking DB I/O)
+scheduler_ops = asyncio.Queue()
+scheduler_worker_task = None
+
+def recurring_job_specs(reminder_id, chat_id, message, hour, minute, tz, topic_id, recurrence_type, day_of_week=None, job_id=None):
+    """Build the (trigger, trigger_args, job_args) spec for a recurring reminder's cron job; the job id is preallocated"""
+    if recurrence_type not in ('daily', 'weekly'):
+        return []
+    trigger_args = {'id': job_id or uuid.uuid4().hex, 'hour': hour, 'minute': minute, 'timezone': tz}
+    if recurrence_type == 'weekly' and day_of_week:
+        # The cron trigger fires on every day in a comma-separated list like "mon,wed,fri"
+        trigger_args['day_of_week'] = day_of_week
+    return [('cron', trigger_args, (chat_id, message, None, reminder_id, topic_id))]
+
+def apply_scheduler_batch(remove_job_ids, job_specs):
+    """Remove then add jobs; returns the new job ids. An unexpected removal error aborts the batch; already-missing jobs are skipped"""
+    for job_id in remove_job_ids:
+        try:
+            scheduler.remove_job(job_id)
+            logger.info("Removed job %s", job_id)
+        except JobLookupError:
+            logger.info("Job %s was already removed", job_id)
+    return [
+        scheduler.add_job(schedule_reminder, trigger, args=job_args, **trigger_args).id
+        for trigger, trigger_args, job_args in job_specs
+    ]
+
+async def scheduler_worker():
+    """Apply queued scheduler batches one at a time in a worker thread"""
+    while True:
+        remove_job_ids, job_specs, future = await scheduler_ops.get()
+        try:
+            result = await asyncio.to_thread(apply_scheduler_batch, remove_job_ids, job_specs)
+            if not future.done():
+                future.set_result(result)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        finally:
+            scheduler_ops.task_done()
+
+async def reschedule_jobs(remove_job_ids, job_specs):
+    """Queue a remove+add batch for scheduler_worker and wait for the new job ids"""
+    future = asyncio.get_running_loop().create_future()
+    await scheduler_ops.put((list(remove_job_ids), job_specs, future))
+    return await future
+
+async def schedule_new_reminder(reminder_id, user_id, specs):
+    """Schedule a just-inserted reminder's jobs; returns False after deleting the row if that fails, so no unscheduled reminder is left behind"""
+    try:
+        await reschedule_jobs([], specs)
+        return True
+    except Exception as e:
+        logger.error("Failed to schedule new reminder %s: %s", reminder_id, e)
+    try:
+        await asyncio.to_thread(db.delete_reminder, reminder_id, user_id)
+    except Exception as e:
+        logger.error("Failed to delete unscheduled reminder %s: %s", reminder_id, e)
+    return False
+
+SCHEDULE_FAILED_TEXT = "❌ Could not schedule the updated reminder, so nothing was changed. Please try again."
+
+async def swap_reminder_jobs(reminder_id, old_job_ids, specs, save):
+    """Schedule an edited reminder's new jobs, store the row with save() and only then drop the old jobs.
+
+    Returns what save() returned, or None if the new jobs could not be scheduled; the row is not touched then.
+    """
+    new_job_ids = [trigger_args['id'] for _, trigger_args, _ in specs]
+    try:
+        await reschedule_jobs([], specs)
+    except Exception as e:
+        logger.error("Failed to schedule new jobs for reminder %s: %s", reminder_id, e)
+        return None
+    saved = False
+    try:
+        saved = await asyncio.to_thread(save)
+    finally:
+        # Whichever set of jobs the row does not point at has to go
+        unused_job_ids = old_job_ids if saved else new_job_ids
+        try:
+            await reschedule_jobs(unused_job_ids, [])
+        except Exception as e:
+            logger.error("Failed to remove jobs %s of reminder %s: %s", unused_job_ids, reminder_id, e)
+    return saved
+
+@dataclass(slots=True)
+class EditContext:
+    """State of an in-progress reminder edit, kept in context.user_data["edit"]"""
+    reminder_id: int
+    current_reminder: tuple
+    field_to_edit: str | None = None
+    step: str | None = None
+    day_mask: int = 0
+    selected_date: str | None = None
+
+@dataclass(slots=True, frozen=True)
+class EditTarget:
+    """Chat, topic and timezone an edited reminder is rescheduled in"""
+    chat_id: int
+    topic_id: int | None
+    tz_str: str
+    tz: ZoneInfo
+
+async def prepare_edit_target(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Resolve the shared preamble of the time-edit handlers; the timezone lookup may hit the DB so it runs in a thread"""
+    chat = update.effective_chat
+    tz_str = await asyncio.to_thread(get_user_timezone, update.effective_user.id, chat.type, chat.id)
+    topic_id, _ = get_topic_info(update, context)
+    return EditTarget(chat.id, topic_id, tz_str, get_tz(tz_str))
+
+async def apply_message_edit(update: Update, context: ContextTypes.DEFAULT_TYPE, edit_context, text):
+    """Save a new reminder message and reschedule its jobs with it"""
     user_id = update.effective_user.id
-    text = update.message.text
-    
-    # Check message length limit (Telegram message limit is 4096 characters)
-    # We'll use 4000 to leave room for bot formatting and other text
-    MAX_MESSAGE_LENGTH = 4000
-    if len(text) > MAX_MESSAGE_LENGTH:
-        await update.message.reply_text(
-            f"❌ Message is too long! Maximum {MAX_MESSAGE_LENGTH} characters allowed.\n"
-            f"Your message has {len(text)} characters.\n\n"
-            "Please send a shorter message:"
-        )
-        return
+    reminder_id = edit_context.reminder_id
+    old_job_ids = await asyncio.to_thread(db.get_reminder_job_ids, reminder_id)
     
-    # Check if user is in note editing context first
-    if user_id in notes_bot.user_note_context:
-        user_context = notes_bot.user_note_context[user_id]
-        step = user_context.get("step")
+    # Reuse the row loaded when the edit started; only query if it is missing
+    reminder_data = edit_context.current_reminder or await asyncio.to_thread(db.get_reminder_by_id, reminder_id, user_id)
+    if reminder_data:
+        reminder_id, message, remind_time, timezone, is_recurring, recurrence_type, day_of_week, chat_id, topic_id = reminder_data
+        tz = get_tz(timezone)
         
-        if step == "editing_title":
-            note_id = user_context["note_id"]
-            new_title = update.message.text
+        # Handle recurring reminders differently
+        if is_recurring:
+            hour, minute = stored_hour_minute(remind_time)
             
-            if notes_bot.notes_db.update_note(note_id, user_id, title=new_title):
-                await update.message.reply_text(f"✅ Title updated successfully for Note #{note_id}!")
-            else:
-                await update.message.reply_text("❌ Failed to update title.")
+            specs = recurring_job_specs(reminder_id, chat_id, text, hour, minute, tz, topic_id, recurrence_type, day_of_week)
+            success_text = f"✅ Recurring reminder {reminder_id} message updated to: {text}"
+        else:
+            # For one-time reminders, parse the ISO datetime and reschedule
+            reminder_time = stored_datetime(remind_time)
+            if reminder_time.tzinfo is None:
+                reminder_time = reminder_time.replace(tzinfo=tz)
             
-            # Clear user context
-            del notes_bot.user_note_context[user_id]
-            return
+            if reminder_time <= datetime.now(UTC):
+                # Already sent or due: a job with a past run_date would still fire within
+                # misfire_grace_time and deliver the reminder a second time. Any job still
+                # stored is left alone, so only the text changes
+                specs, old_job_ids = [], []
+            else:
+                # Replace the scheduled job with one carrying the updated message
+                specs = [('date', {'id': uuid.uuid4().hex, 'run_date': reminder_time}, [chat_id, text, reminder_time, reminder_id, topic_id])]
+            success_text = f"✅ Reminder {reminder_id} message updated to: {text}"
+        
+        # Store the message and the new job IDs in one write once the new jobs exist
+        job_ids = [trigger_args['id'] for _, trigger_args, _ in specs]
+        saved = await swap_reminder_jobs(reminder_id, old_job_ids, specs, functools.partial(
+            db.update_reminder, reminder_id, user_id, message=text, job_id=','.join(job_ids) or None
+        ))
+        if saved is None:
+            await update.message.reply_text(SCHEDULE_FAILED_TEXT)
+        elif saved:
+            invalidate_user_reminders(chat_id)
+            await update.message.reply_text(success_text)
+        else:
+            await update.message.reply_text("❌ Failed to update reminder.")
+    else:
+        await update.message.reply_text("❌ Failed to get reminder details.")
     
+    # Clear edit context
+    context.user_data.pop("edit", None)
 
-    
-    # Check if user is in edit context
-    if user_id in user_edit_context:
-        edit_context = user_edit_context[user_id]
-        field_to_edit = edit_context.get("field_to_edit")
-        step = edit_context.get("step")
-        text = update.message.text
-        if field_to_edit == "message":
-            # Update the message
-            reminder_id = edit_context["reminder_id"]
-            
-            # Get the old job IDs and remove them from scheduler
-            old_job_ids = db.get_reminder_job_ids(reminder_id)
-            for job_id in old_job_ids:
-                try:
-                    scheduler.remove_job(job_id)
-                    logging.info(f"Removed old job {job_id} for reminder {reminder_id}")
-                except Exception as e:
-                    logging.warning(f"Failed to remove old job {job_id}: {e}")
-            
-            # Use regular update function
-            success = db.update_reminder(reminder_id, user_id, message=text)
-            
-            if success:
-                # Get the updated reminder details
-                reminder_data = db.get_reminder_by_id(reminder_id, user_id)
-                if reminder_data:
-                    reminder_id, message, remind_time, timezone, is_recurring, recurrence_type, day_of_week, chat_id, topic_id = reminder_data
-                    
-                    # Handle recurring reminders differently
-                    if is_recurring:
-                        # For recurring reminders, we need to reschedule the job with the new message
-                        try:
-                            tz = pytz.timezone(timezone)
-                        except Exception:
-                            tz = pytz.UTC
-                        
-                        # Parse time for recurring reminders
-                        if isinstance(remind_time, str):
-                            if ':' in remind_time and len(remind_time) <= 8:
-                                # Time string format (e.g., "15:30")
-                                hour, minute = map(int, remind_time.split(':'))
-                            else:
-                                # ISO timestamp string - parse it
-                                reminder_datetime = dateutil.parser.isoparse(remind_time)
-                                hour, minute = reminder_datetime.hour, reminder_datetime.minute
-                        else:
-                            # Already a datetime object
-                            hour, minute = remind_time.hour, remind_time.minute
-                        
-                        if recurrence_type == 'daily':
-                            # Daily recurring reminder
-                            job = scheduler.add_job(
-                                schedule_reminder,
-                                'cron',
-                                hour=hour, minute=minute, timezone=tz,
-                                args=[chat_id, text, None, reminder_id, topic_id]
-                            )
-                            # Store the new job ID
-                            db.update_reminder(reminder_id, user_id, job_id=job.id)
-                        elif recurrence_type == 'weekly':
-                            # Weekly recurring reminder
-                            if day_of_week and ',' in day_of_week:
-                                # Multiple weekdays - create multiple jobs
-                                day_abbrevs = day_of_week.split(',')
-                                job_ids = []
-                                for day_abbrev in day_abbrevs:
-                                    job = scheduler.add_job(
-                                        schedule_reminder,
-                                        'cron',
-                                        day_of_week=day_abbrev, hour=hour, minute=minute, timezone=tz,
-                                        args=[chat_id, text, None, reminder_id, topic_id]
-                                    )
-                                    job_ids.append(job.id)
-                                # Store multiple job IDs
-                                db.update_reminder(reminder_id, user_id, job_id=','.join(job_ids))
-                            else:
-                                # Single weekday
-                                job = scheduler.add_job(
-                                    schedule_reminder,
-                                    'cron',
-                                    day_of_week=day_of_week, hour=hour, minute=minute, timezone=tz,
-                                    args=[chat_id, text, None, reminder_id, topic_id]
-                                )
-                                # Store the new job ID
-                                db.update_reminder(reminder_id, user_id, job_id=job.id)
-                        
-                        await update.message.reply_text(f"✅ Recurring reminder {reminder_id} message updated to: {text}")
-                    else:
-                        # For one-time reminders, parse the ISO datetime and reschedule
-                        try:
-                            tz = pytz.timezone(timezone)
-                        except Exception:
-                            tz = pytz.UTC
-                        
-                        reminder_time = dateutil.parser.isoparse(remind_time)
-                        if reminder_time.tzinfo is None:
-                            reminder_time = tz.localize(reminder_time)
-                        
-                        # Add new scheduled job with updated message
-                        job = scheduler.add_job(
-                            schedule_reminder, 
-                            'date', 
-                            run_date=reminder_time, 
-                            args=[chat_id, text, reminder_time, reminder_id, topic_id]
-                        )
-                        # Store the new job ID
-                        db.update_reminder(reminder_id, user_id, job_id=job.id)
-                        
-                        await update.message.reply_text(f"✅ Reminder {reminder_id} message updated to: {text}")
-                else:
-                    await update.message.reply_text("❌ Failed to get reminder details.")
-            else:
-                await update.message.reply_text("❌ Failed to update reminder.")
-            
-            # Clear edit context
-            del user_edit_context[user_id]
-            return
-        
-        elif field_to_edit == "time":
-            # Handle time input for editing
-            step = edit_context.get("step")
+async def apply_recurring_time_edit(update: Update, context: ContextTypes.DEFAULT_TYPE, edit_context, text):
+    """Save the new time and weekdays of a recurring reminder and reschedule it"""
+    user_id = update.effective_user.id
+    try:
+        parsed = parse_user_time(text)
+        if parsed is None:
+            await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
+            return
+        hour, minute = parsed
+        time_str = f"{hour:02d}:{minute:02d}"
+        
+        # Get edit context
+        reminder_id = edit_context.reminder_id
+        day_mask = edit_context.day_mask
+        selected_days = MASK_WEEKDAYS[day_mask]
+        
+        # Get timezone and topic information
+        target = await prepare_edit_target(update, context)
+        
+        # Determine if it's daily or weekly
+        logger.info("Updating recurring reminder %s: selected_days=%s, time_str=%s", reminder_id, selected_days, time_str)
+        if day_mask == ALL_WEEKDAYS_MASK:  # All days selected
+            recurrence_type, days_string = 'daily', None
+            success_text = f"✅ Recurring reminder {reminder_id} updated to daily at {time_str}!"
+        else:
+            # Store days as comma-separated string
+            recurrence_type = 'weekly'
+            days_string = weekday_days_string(selected_days)
+            selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days)
+            success_text = f"✅ Recurring reminder {reminder_id} updated for {selected_text} at {time_str}!"
+        
+        specs = recurring_job_specs(reminder_id, target.chat_id, edit_context.current_reminder[1], hour, minute, target.tz, target.topic_id, recurrence_type, days_string)
+        job_ids = [trigger_args['id'] for _, trigger_args, _ in specs]
+        old_job_ids = await asyncio.to_thread(db.get_reminder_job_ids, reminder_id)
+        saved = await swap_reminder_jobs(reminder_id, old_job_ids, specs, functools.partial(
+            db.update_reminder, reminder_id, user_id, remind_time=time_str, recurrence_type=recurrence_type, day_of_week=days_string, job_id=','.join(job_ids)
+        ))
+        if saved is None:
+            await update.message.reply_text(SCHEDULE_FAILED_TEXT)
+        elif saved:
+            invalidate_user_reminders(target.chat_id)
+            await update.message.reply_text(success_text)
+        else:
+            await update.message.reply_text("❌ Failed to update recurring reminder.")
+        
+        # Clear edit context
+        context.user_data.pop("edit", None)
+    except Exception as e:
+        logger.error("Error parsing time: %s", e)
+        await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
+
+async def apply_one_time_time_edit(update: Update, context: ContextTypes.DEFAULT_TYPE, edit_context, text):
+    """Move a one-time reminder to the picked date and the typed time"""
+    user_id = update.effective_user.id
+    try:
+        parsed = parse_user_time(text)
+        if parsed is None:
+            await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
+            return
+        hour, minute = parsed
+        time_str = f"{hour:02d}:{minute:02d}"
+        selected_date = edit_context.selected_date
+        
+        # Combine date and time
+        datetime_str = f"{selected_date} {time_str}"
+        
+        # Get timezone and topic information
+        target = await prepare_edit_target(update, context)
+        
+        # Parse the combined datetime
+        reminder_time = parse_local_datetime(datetime_str, target.tz_str)
+        
+        if not reminder_time:
+            await update.message.reply_text("Invalid date/time combination. Please try again.")
+            context.user_data.pop("edit", None)
+            return
+        
+        if reminder_time < datetime.now(UTC):
+            await update.message.reply_text("The time is in the past. Please try again.")
+            context.user_data.pop("edit", None)
+            return
+        
+        # Update the reminder time in database
+        reminder_id = edit_context.reminder_id
+        job_id = uuid.uuid4().hex
+        old_job_ids = await asyncio.to_thread(db.get_reminder_job_ids, reminder_id)
+        # Add the new job, store the new time and job ID in one write, then remove the old job
+        specs = [('date', {'id': job_id, 'run_date': reminder_time}, [target.chat_id, edit_context.current_reminder[1], reminder_time, reminder_id, target.topic_id])]
+        saved = await swap_reminder_jobs(reminder_id, old_job_ids, specs, functools.partial(
+            db.update_reminder, reminder_id, user_id, remind_time=reminder_time.isoformat(), job_id=job_id
+        ))
+        if saved is None:
+            await update.message.reply_text(SCHEDULE_FAILED_TEXT)
+        elif saved:
+            invalidate_user_reminders(target.chat_id)
+            await update.message.reply_text(
+                f"✅ Reminder {reminder_id} time updated to {reminder_time.strftime('%Y-%m-%d %H:%M:%S %Z')}!"
+            )
+        else:
+            await update.message.reply_text("❌ Failed to update reminder.")
+        
+        # Clear edit context
+        context.user_data.pop("edit", None)
+    except Exception as e:
+        logger.error("Error parsing time: %s", e)
+        await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
+
+# Telegram counts the 4096 message limit in UTF-16 code units; 4000 leaves
+# room for bot formatting and other text
+MAX_MESSAGE_LENGTH = 4000
+
+def message_length(text):
+    """Length of text in UTF-16 code units; short texts that cannot reach the limit skip the encode"""
+    if 2 * len(text) <= MAX_MESSAGE_LENGTH:
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+# Text-input handlers for the edit flow, keyed by (field_to_edit, step); step None matches any step
+EDIT_HANDLERS = {
+    ("message", None): apply_message_edit,
+    ("time", STEP_EDIT_RECURRING_TIME_INPUT): apply_recurring_time_edit,
+    ("time", STEP_EDIT_WAITING_FOR_TIME): apply_one_time_time_edit,
+}
+
+async def handle_reminder_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Handle text input for reminder creation and editing"""
+    import notes_bot
+    user_id = update.effective_user.id
+    text = update.message.text
+    
+    # Check message length limit
+    text_length = message_length(text)
+    if text_length > MAX_MESSAGE_LENGTH:
+        await update.message.reply_text(
+            f"❌ Message is too long! Maximum {MAX_MESSAGE_LENGTH} characters allowed.\n"
+            f"Your message has {text_length} characters.\n\n"
+            "Please send a shorter message:"
+        )
+        return
+    
+    # Check if user is in note editing context first
+    if "note" in context.user_data:
+        user_context = context.user_data["note"]
+        step = user_context.get("step")
+        
+        if step == "editing_title":
+            note_id = user_context["note_id"]
+            new_title = update.message.text
             
-            if step == "editing_recurring_time_input":
-                # Handle recurring reminder time editing
-                try:
-                    parsed_time = parse_date(text, settings={'PREFER_DATES_FROM': 'future'})
-                    if parsed_time:
-                        time_str = parsed_time.strftime("%H:%M")
-                        
-                        # Get edit context
-                        reminder_id = edit_context["reminder_id"]
-                        selected_days = edit_context["selected_days"]
-                        
-                        # Get the old job IDs and remove them from scheduler
-                        old_job_ids = db.get_reminder_job_ids(reminder_id)
-                        for job_id in old_job_ids:
-                            try:
-                                scheduler.remove_job(job_id)
-                                logging.info(f"Removed old job {job_id} for reminder {reminder_id}")
-                            except Exception as e:
-                                logging.warning(f"Failed to remove old job {job_id}: {e}")
-                        
-                        # Get timezone and topic information
-                        chat = update.effective_chat
-                        tz_str = get_user_timezone(user_id, chat.type, chat.id)
-                        topic_id, topic_name = await get_topic_info(update, context)
-                        
-                        try:
-                            tz = pytz.timezone(tz_str)
-                        except Exception:
-                            tz = pytz.UTC
-                        
-                        # Parse time
-                        hour, minute = map(int, time_str.split(':'))
-                        
-                        # Map full day names to APScheduler format
-                        day_mapping = {
-                            'monday': 'mon',
-                            'tuesday': 'tue', 
-                            'wednesday': 'wed',
-                            'thursday': 'thu',
-                            'friday': 'fri',
-                            'saturday': 'sat',
-                            'sunday': 'sun'
-                        }
-                        
-                        # Determine if it's daily or weekly
-                        logging.info(f"Updating recurring reminder {reminder_id}: selected_days={selected_days}, time_str={time_str}")
-                        logging.info(f"Number of selected days: {len(selected_days)}")
-                        if len(selected_days) == 7:  # All days selected
-                            # Update to daily recurring reminder
-                            if db.update_reminder(reminder_id, user_id, remind_time=time_str, recurrence_type='daily', day_of_week=None):
-                                # Create daily recurring job
-                                job = scheduler.add_job(
-                                    schedule_reminder,
-                                    'cron',
-                                    hour=hour, minute=minute, timezone=tz,
-                                    args=[chat.id, edit_context["current_reminder"][1], None, reminder_id, topic_id]
-                                )
-                                # Store the new job ID
-                                db.update_reminder(reminder_id, user_id, job_id=job.id)
-                                
-                                await update.message.reply_text(
-                                    f"✅ Recurring reminder {reminder_id} updated to daily at {time_str}!"
-                                )
-                            else:
-                                await update.message.reply_text("❌ Failed to update recurring reminder.")
-                        else:
-                            # Update to weekly recurring reminder with multiple days
-                            # Store days as comma-separated string
-                            day_abbrevs = [day_mapping.get(day, day) for day in selected_days]
-                            days_string = ','.join(day_abbrevs)
-                            
-                            if db.update_reminder(reminder_id, user_id, remind_time=time_str, recurrence_type='weekly', day_of_week=days_string):
-                                # Create multiple cron jobs for each day
-                                job_ids = []
-                                for day_abbrev in day_abbrevs:
-                                    job = scheduler.add_job(
-                                        schedule_reminder,
-                                        'cron',
-                                        day_of_week=day_abbrev, hour=hour, minute=minute, timezone=tz,
-                                        args=[chat.id, edit_context["current_reminder"][1], None, reminder_id, topic_id]
-                                    )
-                                    job_ids.append(job.id)
-                                
-                                # Store multiple job IDs
-                                db.update_reminder(reminder_id, user_id, job_id=','.join(job_ids))
-                                
-                                selected_text = ", ".join([day.title() for day in selected_days])
-                                await update.message.reply_text(
-                                    f"✅ Recurring reminder {reminder_id} updated for {selected_text} at {time_str}!"
-                                )
-                            else:
-                                await update.message.reply_text("❌ Failed to update recurring reminder.")
-                        
-                        # Clear edit context
-                        del user_edit_context[user_id]
-                        return
-                    else:
-                        await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-                except Exception as e:
-                    logging.error(f"Error parsing time: {e}")
-                    await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-            elif step == "waiting_for_edit_time":
-                # Handle one-time reminder time editing
-                try:
-                    parsed_time = parse_date(text, settings={'PREFER_DATES_FROM': 'future'})
-                    if parsed_time:
-                        time_str = parsed_time.strftime("%H:%M")
-                        selected_date = edit_context["selected_date"]
-                        
-                        # Combine date and time
-                        datetime_str = f"{selected_date} {time_str}"
-                        
-                        # Get timezone
-                        chat = update.effective_chat
-                        tz_str = get_user_timezone(user_id, chat.type, chat.id)
-                        
-                        try:
-                            tz = pytz.timezone(tz_str)
-                        except Exception:
-                            tz = pytz.UTC
-                        
-                        # Parse the combined datetime
-                        reminder_time = parse_date(datetime_str, settings={'PREFER_DATES_FROM': 'future', 'TIMEZONE': tz_str, 'RETURN_AS_TIMEZONE_AWARE': True})
-                        
-                        if not reminder_time:
-                            await update.message.reply_text("Invalid date/time combination. Please try again.")
-                            del user_edit_context[user_id]
-                            return
-                        
-                        if reminder_time.tzinfo is None:
-                            reminder_time = tz.localize(reminder_time)
-                        
-                        now = datetime.now(tz)
-                        if reminder_time < now:
-                            await update.message.reply_text("The time is in the past. Please try again.")
-                            del user_edit_context[user_id]
-                            return
-                        
-                        # Update the reminder time in database
-                        reminder_id = edit_context["reminder_id"]
-                        if db.update_reminder(reminder_id, user_id, remind_time=reminder_time.isoformat()):
-                            # Remove old scheduled job and add new one
-                            old_job_ids = db.get_reminder_job_ids(reminder_id)
-                            for job_id in old_job_ids:
-                                try:
-                                    scheduler.remove_job(job_id)
-                                    logging.info(f"Removed old job {job_id} for reminder {reminder_id}")
-                                except Exception as e:
-                                    logging.warning(f"Failed to remove old job {job_id}: {e}")
-                            
-                            # Add new scheduled job
-                            job = scheduler.add_job(
-                                schedule_reminder, 
-                                'date', 
-                                run_date=reminder_time, 
-                                args=[chat.id, edit_context["current_reminder"][1], reminder_time, reminder_id]
-                            )
-                            # Store the new job ID
-                            db.update_reminder(reminder_id, user_id, job_id=job.id)
-                            
-                            await update.message.reply_text(
-                                f"✅ Reminder {reminder_id} time updated to {reminder_time.strftime('%Y-%m-%d %H:%M:%S %Z')}!"
-                            )
-                        else:
-                            await update.message.reply_text("❌ Failed to update reminder.")
-                        
-                        # Clear edit context
-                        del user_edit_context[user_id]
-                        return
-                    else:
-                        await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-                except Exception as e:
-                    logging.error(f"Error parsing time: {e}")
-                    await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-        elif step == "editing_recurring_time_input":
-            # Handle time input for editing recurring reminders
-            try:
-                parsed_time = parse_date(text, settings={'PREFER_DATES_FROM': 'future'})
-                if parsed_time:
-                    time_str = parsed_time.strftime("%H:%M")
-                    
-                    # Get edit context
-                    reminder_id = edit_context["reminder_id"]
-                    selected_days = edit_context["selected_days"]
-                    
-                    # Get the old job IDs and remove them from scheduler
-                    old_job_ids = db.get_reminder_job_ids(reminder_id)
-                    for job_id in old_job_ids:
-                        try:
-                            scheduler.remove_job(job_id)
-                            logging.info(f"Removed old job {job_id} for reminder {reminder_id}")
-                        except Exception as e:
-                            logging.warning(f"Failed to remove old job {job_id}: {e}")
-                    
-                    # Get timezone and topic information
-                    chat = update.effective_chat
-                    tz_str = get_user_timezone(user_id, chat.type, chat.id)
-                    topic_id, topic_name = await get_topic_info(update, context)
-                    
-                    try:
-                        tz = pytz.timezone(tz_str)
-                    except Exception:
-                        tz = pytz.UTC
-                    
-                    # Parse time
-                    hour, minute = map(int, time_str.split(':'))
-                    
-                    # Map full day names to APScheduler format
-                    day_mapping = {
-                        'monday': 'mon',
-                        'tuesday': 'tue', 
-                        'wednesday': 'wed',
-                        'thursday': 'thu',
-                        'friday': 'fri',
-                        'saturday': 'sat',
-                        'sunday': 'sun'
-                    }
-                    
-                    # Determine if it's daily or weekly
-                    logging.info(f"Updating recurring reminder {reminder_id}: selected_days={selected_days}, time_str={time_str}")
-                    logging.info(f"Number of selected days: {len(selected_days)}")
-                    if len(selected_days) == 7:  # All days selected
-                        # Update to daily recurring reminder
-                        if db.update_reminder(reminder_id, user_id, remind_time=time_str, recurrence_type='daily', day_of_week=None):
-                            # Create daily recurring job
-                            job = scheduler.add_job(
-                                schedule_reminder,
-                                'cron',
-                                hour=hour, minute=minute, timezone=tz,
-                                args=[chat.id, edit_context["current_reminder"][1], None, reminder_id, topic_id]
-                            )
-                            # Store the new job ID
-                            db.update_reminder(reminder_id, user_id, job_id=job.id)
-                            
-                            await update.message.reply_text(
-                                f"✅ Recurring reminder {reminder_id} updated to daily at {time_str}!"
-                            )
-                        else:
-                            await update.message.reply_text("❌ Failed to update recurring reminder.")
-                    else:
-                        # Update to weekly recurring reminder with multiple days
-                        # Store days as comma-separated string
-                        day_abbrevs = [day_mapping.get(day, day) for day in selected_days]
-                        days_string = ','.join(day_abbrevs)
-                        
-                        if db.update_reminder(reminder_id, user_id, remind_time=time_str, recurrence_type='weekly', day_of_week=days_string):
-                            # Create multiple cron jobs for each day
-                            job_ids = []
-                            for day_abbrev in day_abbrevs:
-                                job = scheduler.add_job(
-                                    schedule_reminder,
-                                    'cron',
-                                    day_of_week=day_abbrev, hour=hour, minute=minute, timezone=tz,
-                                    args=[chat.id, edit_context["current_reminder"][1], None, reminder_id, topic_id]
-                                )
-                                job_ids.append(job.id)
-                            
-                            # Store multiple job IDs
-                            db.update_reminder(reminder_id, user_id, job_id=','.join(job_ids))
-                            
-                            selected_text = ", ".join([day.title() for day in selected_days])
-                            await update.message.reply_text(
-                                f"✅ Recurring reminder {reminder_id} updated for {selected_text} at {time_str}!"
-                            )
-                        else:
-                            await update.message.reply_text("❌ Failed to update recurring reminder.")
-                    
-                    # Clear edit context
-                    del user_edit_context[user_id]
-                    return
-                else:
-                    await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-            except Exception as e:
-                logging.error(f"Error parsing time: {e}")
-                await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-                try:
-                    parsed_time = parse_date(text, settings={'PREFER_DATES_FROM': 'future'})
-                    if parsed_time:
-                        time_str = parsed_time.strftime("%H:%M")
-                        selected_date = edit_context["selected_date"]
-                        
-                        # Combine date and time
-                        datetime_str = f"{selected_date} {time_str}"
-                        
-                        # Get timezone
-                        chat = update.effective_chat
-                        tz_str = get_user_timezone(user_id, chat.type, chat.id)
-                        
-                        try:
-                            tz = pytz.timezone(tz_str)
-                        except Exception:
-                            tz = pytz.UTC
-                        
-                        # Parse the combined datetime
-                        reminder_time = parse_date(datetime_str, settings={'PREFER_DATES_FROM': 'future', 'TIMEZONE': tz_str, 'RETURN_AS_TIMEZONE_AWARE': True})
-                        
-                        if not reminder_time:
-                            await update.message.reply_text("Invalid date/time combination. Please try again.")
-                            del user_edit_context[user_id]
-                            return
-                        
-                        if reminder_time.tzinfo is None:
-                            reminder_time = tz.localize(reminder_time)
-                        
-                        now = datetime.now(tz)
-                        if reminder_time < now:
-                            await update.message.reply_text("The time is in the past. Please try again.")
-                            del user_edit_context[user_id]
-                            return
-                        
-                        # Get topic information
-                        topic_id, topic_name = await get_topic_info(update, context)
-                        
-                        # Update the reminder time in database
-                        reminder_id = edit_context["reminder_id"]
-                        
-                        # Get the old job IDs and remove them from scheduler
-                        old_job_ids = db.get_reminder_job_ids(reminder_id)
-                        for job_id in old_job_ids:
-                            try:
-                                scheduler.remove_job(job_id)
-                                logging.info(f"Removed old job {job_id} for reminder {reminder_id}")
-                            except Exception as e:
-                                logging.warning(f"Failed to remove old job {job_id}: {e}")
-                        
-                        # Get current reminder data to check if it's recurring
-                        reminder_data = db.get_reminder_by_id(reminder_id, user_id)
-                        if not reminder_data:
-                            await update.message.reply_text("❌ Failed to get reminder details.")
-                            del user_edit_context[user_id]
-                            return
-                        
-                        _, _, _, _, is_recurring, recurrence_type, day_of_week, _, _ = reminder_data
-                        
-                        if is_recurring:
-                            # Handle recurring reminder time update
-                            # Extract time string (HH:MM) from the datetime
-                            time_str = reminder_time.strftime("%H:%M")
-                            
-                            # Update the reminder time in database (store as time string for recurring)
-                            if db.update_reminder(reminder_id, user_id, remind_time=time_str):
-                                # Create new recurring job
-                                try:
-                                    tz = pytz.timezone(tz_str)
-                                except Exception:
-                                    tz = pytz.UTC
-                                
-                                hour, minute = map(int, time_str.split(':'))
-                                
-                                if recurrence_type == 'daily':
-                                    # Daily recurring reminder
-                                    job = scheduler.add_job(
-                                        schedule_reminder,
-                                        'cron',
-                                        hour=hour, minute=minute, timezone=tz,
-                                        args=[chat.id, edit_context["current_reminder"][1], None, reminder_id, topic_id]
-                                    )
-                                elif recurrence_type == 'weekly':
-                                    # Weekly recurring reminder
-                                    if ',' in day_of_week:
-                                        # Multiple weekdays - create multiple jobs
-                                        day_abbrevs = day_of_week.split(',')
-                                        job_ids = []
-                                        for day_abbrev in day_abbrevs:
-                                            job = scheduler.add_job(
-                                                schedule_reminder,
-                                                'cron',
-                                                day_of_week=day_abbrev, hour=hour, minute=minute, timezone=tz,
-                                                args=[chat.id, edit_context["current_reminder"][1], None, reminder_id, topic_id]
-                                            )
-                                            job_ids.append(job.id)
-                                        # Store multiple job IDs
-                                        db.update_reminder(reminder_id, user_id, job_id=','.join(job_ids))
-                                    else:
-                                        # Single weekday
-                                        job = scheduler.add_job(
-                                            schedule_reminder,
-                                            'cron',
-                                            day_of_week=day_of_week, hour=hour, minute=minute, timezone=tz,
-                                            args=[chat.id, edit_context["current_reminder"][1], None, reminder_id, topic_id]
-                                        )
-                                        # Store the new job ID
-                                        db.update_reminder(reminder_id, user_id, job_id=job.id)
-                                
-                                await update.message.reply_text(
-                                    f"✅ Recurring reminder {reminder_id} time updated to {time_str}!"
-                                )
-                            else:
-                                await update.message.reply_text("❌ Failed to update recurring reminder.")
-                        else:
-                            # Handle one-time reminder time update
-                            if db.update_reminder(reminder_id, user_id, remind_time=reminder_time.isoformat()):
-                                # Add new scheduled job
-                                job = scheduler.add_job(
-                                    schedule_reminder, 
-                                    'date', 
-                                    run_date=reminder_time, 
-                                    args=[chat.id, edit_context["current_reminder"][1], reminder_time, reminder_id, topic_id]
-                                )
-                                # Store the new job ID
-                                db.update_reminder(reminder_id, user_id, job_id=job.id)
-                                
-                                await update.message.reply_text(
-                                    f"✅ Reminder {reminder_id} time updated to {reminder_time.strftime('%Y-%m-%d %H:%M:%S %Z')}!"
-                                )
-                            else:
-                                await update.message.reply_text("❌ Failed to update reminder.")
-                        
-                        # Clear edit context
-                        del user_edit_context[user_id]
-                        return
-                    else:
-                        await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-                except Exception as e:
-                    logging.error(f"Error parsing time: {e}")
-                    await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
+            if notes_bot.notes_db.update_note(note_id, user_id, title=new_title):
+                await update.message.reply_text(f"✅ Title updated successfully for Note #{note_id}!")
+            else:
+                await update.message.reply_text("❌ Failed to update title.")
+            
+            # Clear user context
+            context.user_data.pop("note", None)
+            return
+    
+
+    
+    # Check if user is in edit context
+    edit_context = context.user_data.get("edit")
+    if edit_context:
+        field_to_edit = edit_context.field_to_edit
+        step = edit_context.step
+        handler = EDIT_HANDLERS.get((field_to_edit, step)) or EDIT_HANDLERS.get((field_to_edit, None))
+        if handler:
+            await handler(update, context, edit_context, text)
         else:
             # Fallback: if we're in edit context but no specific handler matched
-            logging.warning(f"No specific handler matched for edit context. field_to_edit={field_to_edit}, step={step}")
-            logging.warning(f"Condition not matched. edit_context.get('step')='{edit_context.get('step')}', step='{step}'")
-            logging.warning(f"edit_context.get('step') == 'editing_recurring_time_input': {edit_context.get('step') == 'editing_recurring_time_input'}")
-            logging.warning(f"step == 'editing_recurring_time_input': {step == 'editing_recurring_time_input'}")
-            logging.warning(f"step type: {type(step)}, step repr: {repr(step)}")
-            logging.warning(f"edit_context.get('step') type: {type(edit_context.get('step'))}, edit_context.get('step') repr: {repr(edit_context.get('step'))}")
+            logger.debug("No specific handler matched for edit context. field_to_edit=%s, step=%r", field_to_edit, step)
             await update.message.reply_text("I'm not sure what you want to edit. Please try again.")
-            return
+        return
     
     # Handle regular reminder creation
-    if user_id not in user_reminder_context:
+    reminder_context = context.user_data.get("reminder")
+    if reminder_context is None:
         return
     
-    step = user_reminder_context[user_id].get("step")
+    step = reminder_context.get("step")
     text = update.message.text
+    # Aware datetimes compare across timezones, so one UTC clock read serves every past-time check
+    now_utc = datetime.now(UTC)
     
-    if step == "waiting_for_time":
+    if step == STEP_WAITING_FOR_TIME:
         # Handle time input for one-time reminders
-        try:
-            # First validate the input format
-            text_clean = text.strip().lower()
-            
-            # Check for common time formats
-            if ':' in text and not any(word in text_clean for word in ['am', 'pm', 'a.m.', 'p.m.']):
-                # HH:MM format (but not AM/PM format)
-                parts = text.split(':')
-                if len(parts) == 2:
-                    try:
-                        hour = int(parts[0])
-                        minute = int(parts[1])
-                        if 0 <= hour <= 23 and 0 <= minute <= 59:
-                            time_str = f"{hour:02d}:{minute:02d}"
-                            # Validate that the selected date+time is not in the past
-                            date_str = user_reminder_context[user_id]['date']
-                            chat = update.effective_chat
-                            tz_str = get_user_timezone(user_id, chat.type, chat.id)
-                            try:
-                                tz = pytz.timezone(tz_str)
-                            except Exception:
-                                tz = pytz.UTC
-                            try:
-                                selected_date = datetime.strptime(date_str, "%Y-%m-%d")
-                                candidate_dt = selected_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                                if candidate_dt.tzinfo is None:
-                                    candidate_dt = tz.localize(candidate_dt)
-                                if candidate_dt < datetime.now(tz):
-                                    await update.message.reply_text("The time is in the past. Please enter a future time:")
-                                    return
-                            except Exception as e:
-                                logging.error(f"Error validating time against date: {e}")
-                                await update.message.reply_text("Invalid time. Please try again with HH:MM or 2:30 PM format:")
-                                return
-                            user_reminder_context[user_id]["time"] = time_str
-                            user_reminder_context[user_id]["step"] = "time_selected"
-                            
-                            await update.message.reply_text(
-                                f"Date: {user_reminder_context[user_id]['date']}\n"
-                                f"Time: {time_str}\n\n"
-                                "Now send your reminder message:"
-                            )
-                            return
-                    except ValueError:
-                        pass
-            elif any(word in text_clean for word in ['am', 'pm', 'a.m.', 'p.m.']):
-                # Try to parse with dateparser for AM/PM format
-                parsed_time = parse_date(text, settings={'PREFER_DATES_FROM': 'future'})
-                if parsed_time:
-                    time_str = parsed_time.strftime("%H:%M")
-                    # Validate that the selected date+time is not in the past
-                    date_str = user_reminder_context[user_id]['date']
-                    hour, minute = map(int, time_str.split(':'))
-                    chat = update.effective_chat
-                    tz_str = get_user_timezone(user_id, chat.type, chat.id)
-                    try:
-                        tz = pytz.timezone(tz_str)
-                    except Exception:
-                        tz = pytz.UTC
-                    try:
-                        selected_date = datetime.strptime(date_str, "%Y-%m-%d")
-                        candidate_dt = selected_date.replace(hour=hour, minute=minute, second=0, microsecond=0)
-                        if candidate_dt.tzinfo is None:
-                            candidate_dt = tz.localize(candidate_dt)
-                        if candidate_dt < datetime.now(tz):
-                            await update.message.reply_text("The time is in the past. Please enter a future time:")
-                            return
-                    except Exception as e:
-                        logging.error(f"Error validating time against date: {e}")
-                        await update.message.reply_text("Invalid time. Please try again with HH:MM or 2:30 PM format:")
-                        return
-                    user_reminder_context[user_id]["time"] = time_str
-                    user_reminder_context[user_id]["step"] = "time_selected"
-                    
-                    await update.message.reply_text(
-                        f"Date: {user_reminder_context[user_id]['date']}\n"
-                        f"Time: {time_str}\n\n"
-                        "Now send your reminder message:"
-                    )
-                    return
-                else:
-                    await update.message.reply_text("Invalid time format. Please use HH:MM (e.g., 14:30) or 2:30 PM format:")
-                    return
-            
-            # If we get here, the format is invalid
+        parsed = parse_user_time(text)
+        if parsed is None:
             await update.message.reply_text("Invalid time format. Please use HH:MM (e.g., 14:30) or 2:30 PM format:")
+            return
+        hour, minute = parsed
+        time_str = f"{hour:02d}:{minute:02d}"
+        # Validate that the selected date+time is not in the past
+        date_str = reminder_context['date']
+        chat = update.effective_chat
+        tz_str = get_user_timezone(user_id, chat.type, chat.id)
+        tz = get_tz(tz_str)
+        try:
+            selected_date = datetime.strptime(date_str, "%Y-%m-%d")
+            candidate_dt = selected_date.replace(hour=hour, minute=minute, tzinfo=tz)
+            if candidate_dt < now_utc:
+                await update.message.reply_text("The time is in the past. Please enter a future time:")
+                return
         except Exception as e:
-            logging.error(f"Error parsing time: {e}")
-            await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
+            logger.error("Error validating time against date: %s", e)
+            await update.message.reply_text("Invalid time. Please try again with HH:MM or 2:30 PM format:")
+            return
+        reminder_context["time"] = time_str
+        reminder_context["step"] = STEP_TIME_SELECTED
+        
+        await update.message.reply_text(
+            f"Date: {reminder_context['date']}\n"
+            f"Time: {time_str}\n\n"
+            "Now send your reminder message:"
+        )
     
-    elif step == "recurring_time_input":
+    elif step == STEP_RECURRING_TIME_INPUT:
         # Handle time input for recurring reminders
-        try:
-            # First validate the input format
-            text_clean = text.strip().lower()
-            
-            # Check for common time formats
-            if ':' in text and not any(word in text_clean for word in ['am', 'pm', 'a.m.', 'p.m.']):
-                # HH:MM format (but not AM/PM format)
-                parts = text.split(':')
-                if len(parts) == 2:
-                    try:
-                        hour = int(parts[0])
-                        minute = int(parts[1])
-                        if 0 <= hour <= 23 and 0 <= minute <= 59:
-                            time_str = f"{hour:02d}:{minute:02d}"
-                            user_reminder_context[user_id]["time"] = time_str
-                            user_reminder_context[user_id]["step"] = "recurring_time_selected"
-                            
-                            selected_days = user_reminder_context[user_id]["selected_days"]
-                            selected_text = ", ".join([day.title() for day in selected_days])
-                            await update.message.reply_text(
-                                f"Selected days: {selected_text}\n"
-                                f"Time: {time_str}\n\n"
-                                "Now send your reminder message (max 4000 characters):"
-                            )
-                            return
-                    except ValueError:
-                        pass
-            elif any(word in text_clean for word in ['am', 'pm', 'a.m.', 'p.m.']):
-                # Try to parse with dateparser for AM/PM format
-                parsed_time = parse_date(text, settings={'PREFER_DATES_FROM': 'future'})
-                if parsed_time:
-                    time_str = parsed_time.strftime("%H:%M")
-                    user_reminder_context[user_id]["time"] = time_str
-                    user_reminder_context[user_id]["step"] = "recurring_time_selected"
-                    
-                    selected_days = user_reminder_context[user_id]["selected_days"]
-                    selected_text = ", ".join([day.title() for day in selected_days])
-                    await update.message.reply_text(
-                        f"Selected days: {selected_text}\n"
-                        f"Time: {time_str}\n\n"
-                        "Now send your reminder message (max 4000 characters):"
-                    )
-                    return
-                else:
-                    await update.message.reply_text("Invalid time format. Please use HH:MM (e.g., 14:30) or 2:30 PM format:")
-                    return
-            
-            # If we get here, the format is invalid
+        parsed = parse_user_time(text)
+        if parsed is None:
             await update.message.reply_text("Invalid time format. Please use HH:MM (e.g., 14:30) or 2:30 PM format:")
-        except Exception as e:
-            logging.error(f"Error parsing time: {e}")
-            await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
-    
-
+            return
+        hour, minute = parsed
+        time_str = f"{hour:02d}:{minute:02d}"
+        reminder_context["time"] = time_str
+        reminder_context["step"] = STEP_RECURRING_TIME_SELECTED
+        
+        selected_text = ", ".join(WEEKDAY_TITLES[day] for day in MASK_WEEKDAYS[reminder_context["day_mask"]])
+        await update.message.reply_text(
+            f"Selected days: {selected_text}\n"
+            f"Time: {time_str}\n\n"
+            "Now send your reminder message (max 4000 characters):"
+        )
     
-    elif step == "time_selected":
+    elif step == STEP_TIME_SELECTED:
         # Handle message input for one-time reminders
         message = text
-        user_reminder_context[user_id]["message"] = message
+        reminder_context["message"] = message
         
         # Create the one-time reminder
-        date_str = user_reminder_context[user_id]["date"]
-        time_str = user_reminder_context[user_id]["time"]
-        
-        # Combine date and time
-        datetime_str = f"{date_str} {time_str}"
+        date_str = reminder_context["date"]
+        time_str = reminder_context["time"]
         
         # Get timezone
         chat = update.effective_chat
         tz_str = get_user_timezone(user_id, chat.type, chat.id)
         
-        try:
-            tz = pytz.timezone(tz_str)
-        except Exception:
-            tz = pytz.UTC
+        tz = get_tz(tz_str)
         
-        # Parse the combined datetime
-        reminder_time = parse_date(datetime_str, settings={'PREFER_DATES_FROM': 'future', 'TIMEZONE': tz_str, 'RETURN_AS_TIMEZONE_AWARE': True})
-        
-        if not reminder_time:
+        # The date came from the calendar and the time was validated, so the
+        # combined value is parsed directly rather than through dateparser
+        try:
+            reminder_time = datetime.strptime(f"{date_str} {time_str}", "%Y-%m-%d %H:%M").replace(tzinfo=tz)
+        except ValueError:
             await update.message.reply_text("Invalid date/time combination. Please try again.")
-            del user_reminder_context[user_id]
+            context.user_data.pop("reminder", None)
             return
         
-        if reminder_time.tzinfo is None:
-            reminder_time = tz.localize(reminder_time)
-        
-        now = datetime.now(tz)
-        if reminder_time < now:
+        if reminder_time < now_utc:
             await update.message.reply_text("The time is in the past. Please try again.")
-            del user_reminder_context[user_id]
+            context.user_data.pop("reminder", None)
             return
         
         # Get topic information
-        topic_id, topic_name = await get_topic_info(update, context)
-        
-        # Save to database and schedule
-        reminder_id = db.add_reminder(user_id, chat.id, message, reminder_time.isoformat(), tz_str, topic_id=topic_id)
-        job = scheduler.add_job(schedule_reminder, 'date', run_date=reminder_time, args=[chat.id, message, reminder_time, reminder_id, topic_id])
-        # Store the job ID
-        db.update_reminder(reminder_id, user_id, job_id=job.id)
+        topic_id, topic_name = get_topic_info(update, context)
+        
+        # Save to database with a preallocated job ID, then schedule
+        job_id = uuid.uuid4().hex
+        reminder_id = await asyncio.to_thread(db.add_reminder, user_id, chat.id, message, reminder_time.isoformat(), tz_str, topic_id=topic_id, job_id=job_id)
+        invalidate_user_reminders(chat.id)
+        if not await schedule_new_reminder(reminder_id, user_id, [('date', {'id': job_id, 'run_date': reminder_time}, (chat.id, message, reminder_time, reminder_id, topic_id))]):
+            await update.message.reply_text("❌ Failed to schedule reminder. Please try again later.")
+            context.user_data.pop("reminder", None)
+            return
         
         topic_info = f" in {topic_name}" if topic_id else ""
         # Truncate message for confirmation to avoid "Message is too long" error
@@ -1492,80 +1348,49 @@ async def handle_reminder_text_input(update: Update, context: ContextTypes.DEFAU
         )
         
         # Clear user context
-        del user_reminder_context[user_id]
+        context.user_data.pop("reminder", None)
     
-    elif step == "recurring_time_selected":
+    elif step == STEP_RECURRING_TIME_SELECTED:
         # Handle message input for recurring reminders
         message = text
-        user_reminder_context[user_id]["message"] = message
+        reminder_context["message"] = message
         
         # Get selected days and time
-        selected_days = user_reminder_context[user_id]["selected_days"]
-        time_str = user_reminder_context[user_id]["time"]
+        day_mask = reminder_context["day_mask"]
+        time_str = reminder_context["time"]
         
         # Get timezone
         chat = update.effective_chat
         tz_str = get_user_timezone(user_id, chat.type, chat.id)
         
-        try:
-            tz = pytz.timezone(tz_str)
-        except Exception:
-            tz = pytz.UTC
+        tz = get_tz(tz_str)
         
         # Parse time
-        hour, minute = map(int, time_str.split(':'))
-        
-        # Map full day names to APScheduler format
-        day_mapping = {
-            'monday': 'mon',
-            'tuesday': 'tue', 
-            'wednesday': 'wed',
-            'thursday': 'thu',
-            'friday': 'fri',
-            'saturday': 'sat',
-            'sunday': 'sun'
-        }
+        hour, minute = split_hour_minute(time_str)
         
         # Get topic information
-        topic_id, topic_name = await get_topic_info(update, context)
+        topic_id, topic_name = get_topic_info(update, context)
         
         # Determine if it's daily or weekly
-        if len(selected_days) == 7:  # All days selected
-            # Create daily recurring reminder
-            reminder_id = db.add_reminder(user_id, chat.id, message, time_str, tz_str, is_recurring=True, recurrence_type='daily', topic_id=topic_id)
-            job = scheduler.add_job(
-                schedule_reminder,
-                'cron',
-                hour=hour, minute=minute, timezone=tz,
-                args=[chat.id, message, None, reminder_id, topic_id]
-            )
-            # Store the job ID
-            db.update_reminder(reminder_id, user_id, job_id=job.id)
-            
+        if day_mask == ALL_WEEKDAYS_MASK:  # All days selected
+            recurrence_type, days_string = 'daily', None
             selected_text = "Every day"
         else:
-            # Create weekly recurring reminder with multiple days
             # Store days as comma-separated string
-            day_abbrevs = [day_mapping.get(day, day) for day in selected_days]
-            days_string = ','.join(day_abbrevs)
-            
-            reminder_id = db.add_reminder(user_id, chat.id, message, time_str, tz_str, is_recurring=True, recurrence_type='weekly', day_of_week=days_string, topic_id=topic_id)
-            
-            # Create multiple cron jobs for each day
-            job_ids = []
-            for day_abbrev in day_abbrevs:
-                job = scheduler.add_job(
-                    schedule_reminder,
-                    'cron',
-                    day_of_week=day_abbrev, hour=hour, minute=minute, timezone=tz,
-                    args=[chat.id, message, None, reminder_id, topic_id]
-                )
-                job_ids.append(job.id)
-            
-            # Store the first job ID (we'll need to modify the database to store multiple job IDs)
-            db.update_reminder(reminder_id, user_id, job_id=','.join(job_ids))
-            
-            selected_text = ", ".join([day.title() for day in selected_days])
+            recurrence_type = 'weekly'
+            selected_days = MASK_WEEKDAYS[day_mask]
+            days_string = weekday_days_string(selected_days)
+            selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days)
+        
+        # The job ID is allocated up front so the reminder row is written once;
+        # the single cron job is then added by the scheduler worker
+        job_id = uuid.uuid4().hex
+        reminder_id = await asyncio.to_thread(db.add_reminder, user_id, chat.id, message, time_str, tz_str, is_recurring=True, recurrence_type=recurrence_type, day_of_week=days_string, topic_id=topic_id, job_id=job_id)
+        invalidate_user_reminders(chat.id)
+        if not await schedule_new_reminder(reminder_id, user_id, recurring_job_specs(reminder_id, chat.id, message, hour, minute, tz, topic_id, recurrence_type, days_string, job_id)):
+            await update.message.reply_text("❌ Failed to schedule reminder. Please try again later.")
+            context.user_data.pop("reminder", None)
+            return
         
         topic_info = f" in {topic_name}" if topic_id else ""
         # Truncate message for confirmation to avoid "Message is too long" error
@@ -1576,717 +1401,637 @@ async def handle_reminder_text_input(update: Update, context: ContextTypes.DEFAU
         )
         
         # Clear user context
-        del user_reminder_context[user_id]
+        context.user_data.pop("reminder", None)
+
+# Text each callback message was last edited to, so repeated clicks on a closing
+# button do not send an edit Telegram would reject as "message is not modified"
+LAST_EDIT_MAX = 10000
+last_edit_texts = OrderedDict()  # (chat_id, message_id) -> text, oldest first
+
+async def edit_message_once(query, text, **kwargs):
+    """Edit the query's message to text unless it already shows exactly that"""
+    message = query.message
+    key = (message.chat.id, message.message_id)
+    if message.text == text or last_edit_texts.get(key) == text:
+        return
+    last_edit_texts[key] = text
+    last_edit_texts.move_to_end(key)
+    if len(last_edit_texts) > LAST_EDIT_MAX:
+        last_edit_texts.popitem(last=False)
+    await query.edit_message_text(text, **kwargs)
+
+async def callback_remind_type(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show the date picker or the weekday picker for the chosen reminder type"""
+    query = update.callback_query
+    remind_type = query.data.partition(":")[2]
+    if remind_type == "one_time":
+        # Show calendar for date selection
+        today = datetime.now()
+        keyboard = create_calendar_keyboard(today.year, today.month)
+        await query.edit_message_text(
+            "Select a date for your reminder:",
+            reply_markup=keyboard
+        )
+    elif remind_type == "recurring":
+        # Show weekday selection for recurring reminders
+        await query.edit_message_text(
+            "Select weekdays for your recurring reminder:\n(Click to toggle selection)",
+            reply_markup=WEEKDAY_KEYBOARD_MARKUP
+        )
 
-async def reminder_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+async def callback_select_date(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Take the picked date and ask for a time, for a new reminder or an edit"""
     query = update.callback_query
+    selected_date = query.data.partition(":")[2]
     
-    try:
-        await query.answer()
-    except Exception as e:
-        logging.warning(f"Failed to answer callback query: {e}")
-        # Continue processing even if answer fails
-    
-    if query.data.startswith("remind_type:"):
-        remind_type = query.data.split(":", 1)[1]
-        if remind_type == "one_time":
-            # Show calendar for date selection
-            today = datetime.now()
-            keyboard = create_calendar_keyboard(today.year, today.month)
-            await query.edit_message_text(
-                "Select a date for your reminder:",
-                reply_markup=keyboard
-            )
-        elif remind_type == "recurring":
-            # Show weekday selection for recurring reminders
-            keyboard = [
-                [InlineKeyboardButton("Every day", callback_data="select_all_days")],
-                [InlineKeyboardButton("Monday", callback_data="toggle_day:monday")],
-                [InlineKeyboardButton("Tuesday", callback_data="toggle_day:tuesday")],
-                [InlineKeyboardButton("Wednesday", callback_data="toggle_day:wednesday")],
-                [InlineKeyboardButton("Thursday", callback_data="toggle_day:thursday")],
-                [InlineKeyboardButton("Friday", callback_data="toggle_day:friday")],
-                [InlineKeyboardButton("Saturday", callback_data="toggle_day:saturday")],
-                [InlineKeyboardButton("Sunday", callback_data="toggle_day:sunday")],
-                [InlineKeyboardButton("⏰ Set Time", callback_data="set_recurring_time")],
-                [InlineKeyboardButton("Cancel", callback_data="recurring_cancel")]
-            ]
-            await query.edit_message_text(
-                "Select weekdays for your recurring reminder:\n(Click to toggle selection)",
-                reply_markup=InlineKeyboardMarkup(keyboard)
-            )
-        return
-    
-    elif query.data.startswith("select_date:"):
-        selected_date = query.data.split(":", 1)[1]
-        user_id = query.from_user.id
-        
 
-        
-        # Check if this is for editing or creating
-        if user_id in user_edit_context:
-            # This is for editing
-            user_edit_context[user_id]["selected_date"] = selected_date
-            user_edit_context[user_id]["step"] = "waiting_for_edit_time"
-            
-            await query.edit_message_text(
-                f"Date selected: {selected_date}\n\nPlease send the new time in HH:MM format (e.g., 14:30 or 2:30 PM):"
-            )
-            return SELECTING_TIME
-        else:
-            # This is for creating new reminder
-            user_reminder_context[user_id] = {"date": selected_date, "step": "waiting_for_time"}
-            
-            await query.edit_message_text(
-                f"Date selected: {selected_date}\n\nPlease send the time in HH:MM format (e.g., 14:30 or 2:30 PM):"
-            )
     
-    elif query.data == "select_all_days":
-        user_id = query.from_user.id
-        
-        # Initialize user context if not exists
-        if user_id not in user_reminder_context:
-            user_reminder_context[user_id] = {"selected_days": [], "step": "selecting_days"}
-        
-        # Select all days
-        all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        user_reminder_context[user_id]["selected_days"] = all_days
-        
-        # Update keyboard with all days selected
-        keyboard = []
-        for day in all_days:
-            keyboard.append([InlineKeyboardButton(f"✅ {day.title()}", callback_data=f"toggle_day:{day}")])
-        
-        # Add action buttons
-        keyboard.append([InlineKeyboardButton("⏰ Set Time", callback_data="set_recurring_time")])
-        keyboard.append([InlineKeyboardButton("Cancel", callback_data="recurring_cancel")])
+    # Check if this is for editing or creating
+    edit_context = context.user_data.get("edit")
+    if edit_context:
+        # This is for editing
+        edit_context.selected_date = selected_date
+        edit_context.step = STEP_EDIT_WAITING_FOR_TIME
         
         await query.edit_message_text(
-            f"Select weekdays for your recurring reminder:\n(Click to toggle selection)\n\nSelected: All days",
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            f"Date selected: {selected_date}\n\nPlease send the new time in HH:MM format (e.g., 14:30 or 2:30 PM):"
         )
-    
-    elif query.data.startswith("toggle_day:"):
-        day_of_week = query.data.split(":", 1)[1]
-        user_id = query.from_user.id
-        
-        # Initialize user context if not exists
-        if user_id not in user_reminder_context:
-            user_reminder_context[user_id] = {"selected_days": [], "step": "selecting_days"}
-        
-        # Toggle day selection
-        selected_days = user_reminder_context[user_id].get("selected_days", [])
-        if day_of_week in selected_days:
-            selected_days.remove(day_of_week)
-        else:
-            selected_days.append(day_of_week)
-        
-        user_reminder_context[user_id]["selected_days"] = selected_days
-        
-        # Update keyboard with current selections
-        keyboard = []
-        all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        
-        # Check if all days are selected
-        all_selected = all(day in selected_days for day in all_days)
-        
-        # Add "Every day" button
-        if all_selected:
-            keyboard.append([InlineKeyboardButton("Every day", callback_data="select_all_days")])
-        else:
-            keyboard.append([InlineKeyboardButton("Every day", callback_data="select_all_days")])
-        
-        for day in all_days:
-            if day in selected_days:
-                keyboard.append([InlineKeyboardButton(f"✅ {day.title()}", callback_data=f"toggle_day:{day}")])
-            else:
-                keyboard.append([InlineKeyboardButton(day.title(), callback_data=f"toggle_day:{day}")])
-        
-        # Add action buttons
-        keyboard.append([InlineKeyboardButton("⏰ Set Time", callback_data="set_recurring_time")])
-        keyboard.append([InlineKeyboardButton("Cancel", callback_data="recurring_cancel")])
-        
-        if all_selected:
-            selected_text = "All days"
-        else:
-            selected_text = ", ".join([day.title() for day in selected_days]) if selected_days else "None"
+        return SELECTING_TIME
+    else:
+        # This is for creating new reminder
+        context.user_data["reminder"] = {"date": selected_date, "step": STEP_WAITING_FOR_TIME}
         
         await query.edit_message_text(
-            f"Select weekdays for your recurring reminder:\n(Click to toggle selection)\n\nSelected: {selected_text}",
-            reply_markup=InlineKeyboardMarkup(keyboard)
+            f"Date selected: {selected_date}\n\nPlease send the time in HH:MM format (e.g., 14:30 or 2:30 PM):"
         )
+
+async def callback_select_all_days(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Select every weekday for a new recurring reminder"""
+    query = update.callback_query
     
-    elif query.data == "set_recurring_time":
-        user_id = query.from_user.id
-        if user_id in user_reminder_context and user_reminder_context[user_id].get("selected_days"):
-            user_reminder_context[user_id]["step"] = "recurring_time_input"
-            selected_days = user_reminder_context[user_id]["selected_days"]
-            selected_text = ", ".join([day.title() for day in selected_days])
-            await query.edit_message_text(
-                f"Selected days: {selected_text}\n\nPlease send the time in HH:MM format (e.g., 14:30 or 2:30 PM):"
-            )
-        else:
-            await query.edit_message_text("Please select at least one weekday first!")
+    # Initialize user context if not exists
+    reminder_context = context.user_data.get("reminder")
+    if reminder_context is None:
+        reminder_context = context.user_data["reminder"] = {"day_mask": 0, "step": STEP_SELECTING_DAYS}
     
-    # Edit weekday selection handlers
-    elif query.data == "edit_select_all_days":
-        user_id = query.from_user.id
-        
-        # Select all days for editing
-        all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        user_edit_context[user_id]["selected_days"] = all_days
-        
-        # Update keyboard with all days selected
-        keyboard = []
-        for day in all_days:
-            keyboard.append([InlineKeyboardButton(f"✅ {day.title()}", callback_data=f"edit_toggle_day:{day}")])
-        
-        # Add action buttons
-        keyboard.append([InlineKeyboardButton("⏰ Set Time", callback_data="edit_set_recurring_time")])
-        keyboard.append([InlineKeyboardButton("Cancel", callback_data="edit_cancel")])
-        
-        await query.edit_message_text(
-            f"Select weekdays for your recurring reminder (edit):\n(Click to toggle selection)\n\nSelected: All days",
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
+    # Select all days
+    reminder_context["day_mask"] = ALL_WEEKDAYS_MASK
     
-    elif query.data.startswith("edit_toggle_day:"):
-        day_of_week = query.data.split(":", 1)[1]
-        user_id = query.from_user.id
-        
-        # Toggle day selection for editing
-        selected_days = user_edit_context[user_id].get("selected_days", [])
-        if day_of_week in selected_days:
-            selected_days.remove(day_of_week)
-        else:
-            selected_days.append(day_of_week)
-        
-        user_edit_context[user_id]["selected_days"] = selected_days
-        
-        # Update keyboard with current selections
-        keyboard = []
-        all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-        
-        # Check if all days are selected
-        all_selected = all(day in selected_days for day in all_days)
-        
-        # Add "Every day" button
-        if all_selected:
-            keyboard.append([InlineKeyboardButton("Every day", callback_data="edit_select_all_days")])
-        else:
-            keyboard.append([InlineKeyboardButton("Every day", callback_data="edit_select_all_days")])
-        
-        for day in all_days:
-            if day in selected_days:
-                keyboard.append([InlineKeyboardButton(f"✅ {day.title()}", callback_data=f"edit_toggle_day:{day}")])
-            else:
-                keyboard.append([InlineKeyboardButton(day.title(), callback_data=f"edit_toggle_day:{day}")])
-        
-        # Add action buttons
-        keyboard.append([InlineKeyboardButton("⏰ Set Time", callback_data="edit_set_recurring_time")])
-        keyboard.append([InlineKeyboardButton("Cancel", callback_data="edit_cancel")])
-        
-        if all_selected:
-            selected_text = "All days"
-        else:
-            selected_text = ", ".join([day.title() for day in selected_days]) if selected_days else "None"
-        
-        await query.edit_message_text(
-            f"Select weekdays for your recurring reminder (edit):\n(Click to toggle selection)\n\nSelected: {selected_text}",
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
+    await query.edit_message_text(
+        f"Select weekdays for your recurring reminder:\n(Click to toggle selection)\n\nSelected: All days",
+        reply_markup=ALL_WEEKDAYS_KEYBOARD_MARKUP
+    )
+
+async def callback_toggle_day(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Toggle one weekday for a new recurring reminder"""
+    query = update.callback_query
+    day_of_week = query.data.partition(":")[2]
     
-    elif query.data == "edit_set_recurring_time":
-        user_id = query.from_user.id
-        logging.info(f"edit_set_recurring_time called for user {user_id}")
-        if user_id in user_edit_context and user_edit_context[user_id].get("selected_days"):
-            user_edit_context[user_id]["step"] = "editing_recurring_time_input"
-            selected_days = user_edit_context[user_id]["selected_days"]
-            selected_text = ", ".join([day.title() for day in selected_days])
-            logging.info(f"Set step to editing_recurring_time_input for user {user_id}, selected_days={selected_days}")
-            await query.edit_message_text(
-                f"Selected days: {selected_text}\n\nPlease send the new time in HH:MM format (e.g., 14:30 or 2:30 PM):"
-            )
-        else:
-            logging.warning(f"User {user_id} not in edit context or no selected_days")
-            await query.edit_message_text("Please select at least one weekday first!")
-    
-    elif query.data == "recurring_cancel":
-        user_id = query.from_user.id
-        if user_id in user_reminder_context:
-            del user_reminder_context[user_id]
-        await query.edit_message_text("Recurring reminder creation cancelled.")
-    
-    elif query.data == "one_time_cancel":
-        user_id = query.from_user.id
-        if user_id in user_edit_context:
-            # This is for editing - use edit cancel logic
-            del user_edit_context[user_id]
-            await query.edit_message_text("Edit cancelled.")
-        elif user_id in user_reminder_context:
-            # This is for creating new reminder
-            del user_reminder_context[user_id]
-            await query.edit_message_text("One-time reminder creation cancelled.")
-        else:
-            # Fallback
-            await query.edit_message_text("Operation cancelled.")
+    # Initialize user context if not exists
+    reminder_context = context.user_data.get("reminder")
+    if reminder_context is None:
+        reminder_context = context.user_data["reminder"] = {"day_mask": 0, "step": STEP_SELECTING_DAYS}
     
-    elif query.data.startswith("calendar:"):
-        # Handle calendar navigation
-        year_month = query.data.split(":", 1)[1]
-        year, month = map(int, year_month.split("-"))
-        keyboard = create_calendar_keyboard(year, month)
-        await query.edit_message_reply_markup(reply_markup=keyboard)
+    # Toggle day selection
+    day_mask = reminder_context.get("day_mask", 0) ^ WEEKDAY_BITS.get(day_of_week, 0)
+    reminder_context["day_mask"] = day_mask
+    selected_days = MASK_WEEKDAYS[day_mask]
     
-    elif query.data.startswith("delete_reminder:"):
-        reminder_id = int(query.data.split(":", 1)[1])
-        user_id = query.from_user.id
-        
-        # Get the job IDs before deleting
-        job_ids = db.get_reminder_job_ids(reminder_id)
-        
-        if db.delete_reminder(reminder_id, user_id):
-            # Remove from scheduler
-            for job_id in job_ids:
-                try:
-                    scheduler.remove_job(job_id)
-                    logging.info(f"Removed job {job_id} for deleted reminder {reminder_id}")
-                except Exception as e:
-                    logging.warning(f"Failed to remove job {job_id} for deleted reminder {reminder_id}: {e}")
-            
-            await query.edit_message_text(f"✅ Reminder {reminder_id} has been deleted.")
-        else:
-            await query.edit_message_text("❌ Reminder not found or you don't have permission to delete it.")
+    if day_mask == ALL_WEEKDAYS_MASK:
+        selected_text = "All days"
+    else:
+        selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days) if selected_days else "None"
     
-    elif query.data.startswith("edit_reminder_start:"):
-        keyboard = []
-        user_id = query.from_user.id
-        chat_id = query.message.chat.id
-        
+    await query.edit_message_text(
+        f"Select weekdays for your recurring reminder:\n(Click to toggle selection)\n\nSelected: {selected_text}",
+        reply_markup=weekday_keyboard_markup(selected_days)
+    )
 
-        
-        # Parse topic context from callback data
-        topic_context = query.data.split(":", 1)[1]
-        
-        # Determine topic_id from context
-        if topic_context == "general":
-            topic_id = None
-            topic_name = ""
-        elif topic_context == "all":
-            topic_id = None  # Get all reminders
-            topic_name = "all topics"
-        elif topic_context.startswith("topic_"):
-            topic_id = int(topic_context.split("_", 1)[1])
-            topic_name = f"Topic #{topic_id}"
-        else:
-            # Fallback to old logic
-            topic_id = None
-            topic_name = ""
-            logging.warning(f"EDIT BUTTON - Unknown topic context: {topic_context}")
-        
-        # For general chats, we want all reminders (topic_id=None)
-        # For topic chats, we want only reminders from that topic
-        reminders = db.get_user_reminders(user_id, chat_id, topic_id)
-        
-        if not reminders:
-            topic_info = f" in {topic_name}" if topic_id and topic_name else ""
-            await query.edit_message_text(f"No reminders found{topic_info}. You can only edit/delete your own reminders.")
-            return
-        
-        for reminder in reminders:
-            reminder_id = reminder[0]
-            message = reminder[1]
-            # Truncate message if too long
-            if len(message) > 30:
-                message = message[:27] + "..."
-            keyboard.append([InlineKeyboardButton(f"✏️ {reminder_id}: {message}", callback_data=f"edit_reminder:{reminder_id}")])
-        
-        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="edit_cancel")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+async def callback_set_recurring_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ask for the time of a new recurring reminder once weekdays are picked"""
+    query = update.callback_query
+    reminder_context = context.user_data.get("reminder")
+    if reminder_context and reminder_context.get("day_mask"):
+        reminder_context["step"] = STEP_RECURRING_TIME_INPUT
+        selected_days = MASK_WEEKDAYS[reminder_context["day_mask"]]
+        selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days)
         await query.edit_message_text(
-            "Select a reminder to edit:",
-            reply_markup=reply_markup
+            f"Selected days: {selected_text}\n\nPlease send the time in HH:MM format (e.g., 14:30 or 2:30 PM):"
         )
+    else:
+        await query.edit_message_text("Please select at least one weekday first!")
     
-    elif query.data.startswith("delete_reminder_start:"):
-        keyboard = []
-        user_id = query.from_user.id
-        chat_id = query.message.chat.id
-        
-        # Parse topic context from callback data
-        topic_context = query.data.split(":", 1)[1]
-        
-        # Determine topic_id from context
-        if topic_context == "general":
-            topic_id = None
-            topic_name = ""
-        elif topic_context == "all":
-            topic_id = None  # Get all reminders
-            topic_name = "all topics"
-        elif topic_context.startswith("topic_"):
-            topic_id = int(topic_context.split("_", 1)[1])
-            topic_name = f"Topic #{topic_id}"
-        else:
-            # Fallback to old logic
-            topic_id = None
-            topic_name = ""
-            logging.warning(f"DELETE BUTTON - Unknown topic context: {topic_context}")
-        
-        # For general chats, we want all reminders (topic_id=None)
-        # For topic chats, we want only reminders from that topic
-        reminders = db.get_user_reminders(user_id, chat_id, topic_id)
-        
-        if not reminders:
-            topic_info = f" in {topic_name}" if topic_id and topic_name else ""
-            await query.edit_message_text(f"No reminders found{topic_info}. You can only edit/delete your own reminders.")
-            return
-        
-        for reminder in reminders:
-            reminder_id = reminder[0]
-            message = reminder[1]
-            # Truncate message if too long
-            if len(message) > 30:
-                message = message[:27] + "..."
-            keyboard.append([InlineKeyboardButton(f"🗑️ {reminder_id}: {message}", callback_data=f"delete_reminder:{reminder_id}")])
-        
-        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="delete_cancel")])
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        
+
+EDIT_EXPIRED_TEXT = "⌛ This edit session has expired. Please start again with /edit or /list."
+
+async def callback_edit_select_all_days(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Select every weekday while editing a recurring reminder"""
+    query = update.callback_query
+    edit_context = context.user_data.get("edit")
+    if edit_context is None:
+        await edit_message_once(query, EDIT_EXPIRED_TEXT)
+        return
+    
+    # Select all days for editing
+    edit_context.day_mask = ALL_WEEKDAYS_MASK
+    
+    await query.edit_message_text(
+        f"Select weekdays for your recurring reminder (edit):\n(Click to toggle selection)\n\nSelected: All days",
+        reply_markup=EDIT_ALL_WEEKDAYS_KEYBOARD_MARKUP
+    )
+
+async def callback_edit_toggle_day(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Toggle one weekday while editing a recurring reminder"""
+    query = update.callback_query
+    day_of_week = query.data.partition(":")[2]
+    
+    edit_context = context.user_data.get("edit")
+    if edit_context is None:
+        await edit_message_once(query, EDIT_EXPIRED_TEXT)
+        return
+    
+    # Toggle day selection for editing
+    edit_context.day_mask ^= WEEKDAY_BITS.get(day_of_week, 0)
+    selected_days = MASK_WEEKDAYS[edit_context.day_mask]
+    
+    if edit_context.day_mask == ALL_WEEKDAYS_MASK:
+        selected_text = "All days"
+    else:
+        selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days) if selected_days else "None"
+    
+    await query.edit_message_text(
+        f"Select weekdays for your recurring reminder (edit):\n(Click to toggle selection)\n\nSelected: {selected_text}",
+        reply_markup=weekday_keyboard_markup(selected_days, edit=True)
+    )
+
+async def callback_edit_set_recurring_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ask for the new time of an edited recurring reminder"""
+    query = update.callback_query
+    user_id = query.from_user.id
+    logger.info("edit_set_recurring_time called for user %s", user_id)
+    edit_context = context.user_data.get("edit")
+    if edit_context and edit_context.day_mask:
+        edit_context.step = STEP_EDIT_RECURRING_TIME_INPUT
+        selected_days = MASK_WEEKDAYS[edit_context.day_mask]
+        selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days)
+        logger.info("Set step to editing_recurring_time_input for user %s, selected_days=%s", user_id, selected_days)
         await query.edit_message_text(
-            "Select a reminder to delete:",
-            reply_markup=reply_markup
+            f"Selected days: {selected_text}\n\nPlease send the new time in HH:MM format (e.g., 14:30 or 2:30 PM):"
         )
+    else:
+        logger.warning("User %s not in edit context or no days selected", user_id)
+        await query.edit_message_text("Please select at least one weekday first!")
+
+async def callback_recurring_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Abandon recurring reminder creation"""
+    query = update.callback_query
+    context.user_data.pop("reminder", None)
+    await edit_message_once(query, "Recurring reminder creation cancelled.")
+
+async def callback_one_time_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Abandon one-time reminder creation or the edit in progress"""
+    query = update.callback_query
+    if context.user_data.pop("edit", None) is not None:
+        # This is for editing - use edit cancel logic
+        await edit_message_once(query, "Edit cancelled.")
+    elif context.user_data.pop("reminder", None) is not None:
+        # This is for creating new reminder
+        await edit_message_once(query, "One-time reminder creation cancelled.")
+    else:
+        # Fallback
+        await edit_message_once(query, "Operation cancelled.")
+
+async def callback_calendar(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Move the date picker to another month"""
+    query = update.callback_query
+    # Handle calendar navigation
+    year_month = query.data.partition(":")[2]
+    year, month = map(int, year_month.split("-"))
+    keyboard = create_calendar_keyboard(year, month)
+    await query.edit_message_reply_markup(reply_markup=keyboard)
+
+async def callback_delete_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Delete one of the user's reminders"""
+    query = update.callback_query
+    reminder_id = int(query.data.partition(":")[2])
+    user_id = query.from_user.id
     
-    elif query.data.startswith("edit_reminder:"):
-        reminder_id = int(query.data.split(":", 1)[1])
-        user_id = query.from_user.id
-        
-        reminder = db.get_reminder_by_id(reminder_id, user_id)
-        if not reminder:
-            await query.edit_message_text("❌ Reminder not found or you don't have permission to edit it.")
-            return
-        
-        # Store edit context
-        user_edit_context[user_id] = {
-            "reminder_id": reminder_id,
-            "current_reminder": reminder
-        }
-        
-        # Show edit options
-        keyboard = [
-            [InlineKeyboardButton("✏️ Edit Message", callback_data="edit_message")],
-            [InlineKeyboardButton("⏰ Edit Time", callback_data="edit_time")],
-            [InlineKeyboardButton("❌ Cancel", callback_data="edit_cancel")]
-        ]
-        
-        reminder_id, message, remind_time, timezone, is_recurring, recurrence_type, day_of_week, chat_id, topic_id = reminder
-        
-        # Format the time for display in the reminder's stored timezone
-        try:
-            # Resolve reminder's own timezone for display
-            try:
-                reminder_tz = pytz.timezone(timezone)
-            except Exception:
-                reminder_tz = pytz.UTC
-            if is_recurring:
-                # Convert stored remind_time to reminder's timezone and show HH:MM
-                if isinstance(remind_time, str):
-                    try:
-                        reminder_dt = dateutil.parser.isoparse(remind_time)
-                    except Exception:
-                        reminder_dt = dateutil.parser.parse(remind_time)
-                else:
-                    reminder_dt = remind_time
-                if reminder_dt.tzinfo is None:
-                    reminder_dt = reminder_tz.localize(reminder_dt)
-                time_display = reminder_dt.astimezone(reminder_tz).strftime("%H:%M")
-            else:
-                # One-time: display using reminder's stored timezone
-                if isinstance(remind_time, str):
-                    reminder_datetime = dateutil.parser.isoparse(remind_time)
-                else:
-                    reminder_datetime = remind_time
-                if reminder_datetime.tzinfo is None:
-                    reminder_datetime = reminder_tz.localize(reminder_datetime)
-                time_display = reminder_datetime.astimezone(reminder_tz).strftime("%Y-%m-%d %H:%M:%S")
-        except Exception as e:
-            time_display = remind_time  # Fallback to original if parsing fails
-            logging.error(f"Error parsing reminder time for display: {e}")
-        
-        # Convert IANA timezone to UTC offset for display
-        timezone_display = timezone
-        for offset, tz_name in UTC_OFFSET_TO_TZ.items():
-            if tz_name == timezone:
-                timezone_display = offset
-                break
-        
-        edit_message = f"📝 Editing Reminder {reminder_id}:\n\n"
-        edit_message += f"💬 Message: {message}\n"
-        edit_message += f"⏰ Time: {time_display}\n"
-        edit_message += f"🌍 Timezone: {timezone_display}\n"
-        edit_message += f"🔄 Recurring: {'Yes' if is_recurring else 'No'}\n\n"
-        edit_message += "What would you like to edit?"
+    # The delete hands back the reminder's job IDs
+    job_ids = await asyncio.to_thread(db.delete_reminder, reminder_id, user_id)
+    if job_ids is not None:
+        invalidate_user_reminders(query.message.chat.id)
+        # Remove from scheduler in one batch
+        await reschedule_jobs(job_ids, [])
         
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(edit_message, reply_markup=reply_markup)
+        await query.edit_message_text(f"✅ Reminder {reminder_id} has been deleted.")
+    else:
+        await query.edit_message_text("❌ Reminder not found or you don't have permission to delete it.")
+
+async def show_reminder_picker(query, emoji, action, cancel_data, title, label):
+    """List the user's reminders as buttons that call back with action:<reminder_id>"""
+    user_id = query.from_user.id
+    chat_id = query.message.chat.id
+    
+    # Parse topic context from callback data
+    topic_context = query.data.partition(":")[2]
+    
+    # Determine topic_id from context
+    if topic_context == "general":
+        topic_id = None
+        topic_name = ""
+    elif topic_context == "all":
+        topic_id = None  # Get all reminders
+        topic_name = "all topics"
+    elif topic_context.startswith("topic_"):
+        topic_id = int(topic_context.split("_", 1)[1])
+        topic_name = f"Topic #{topic_id}"
+    else:
+        # Fallback to old logic
+        topic_id = None
+        topic_name = ""
+        logger.warning("%s BUTTON - Unknown topic context: %s", label, topic_context)
     
-    elif query.data == "close_list":
-        await query.answer()
-        await query.edit_message_text("Reminder list closed.")
+    # For general chats, we want all reminders (topic_id=None)
+    # For topic chats, we want only reminders from that topic
+    reminders = await get_user_reminders_cached(user_id, chat_id, topic_id)
     
-    elif query.data == "edit_cancel":
-        await query.answer()
-        user_id = query.from_user.id
-        if user_id in user_edit_context:
-            del user_edit_context[user_id]
-        await query.edit_message_text("Edit cancelled.")
+    if not reminders:
+        topic_info = f" in {topic_name}" if topic_id and topic_name else ""
+        await query.edit_message_text(f"No reminders found{topic_info}. You can only edit/delete your own reminders.")
+        return
     
-    elif query.data == "delete_cancel":
-        await query.answer()
-        await query.edit_message_text("Delete cancelled.")
+    keyboard = []
+    for reminder in reminders:
+        reminder_id = reminder[0]
+        message = reminder[1]
+        # Truncate message if too long
+        if len(message) > 30:
+            message = message[:27] + "..."
+        keyboard.append([InlineKeyboardButton(f"{emoji} {reminder_id}: {message}", callback_data=f"{action}:{reminder_id}")])
     
-    elif query.data == "edit_message":
-        user_id = query.from_user.id
-        if user_id in user_edit_context:
-            user_edit_context[user_id]["field_to_edit"] = "message"
-            await query.edit_message_text("Please send the new message for your reminder (max 4000 characters):")
+    keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data=cancel_data)])
     
-    elif query.data == "edit_time":
-        user_id = query.from_user.id
-        if user_id in user_edit_context:
-            user_edit_context[user_id]["field_to_edit"] = "time"
-            # Check if this is a recurring reminder
-            reminder = user_edit_context[user_id]["current_reminder"]
-            is_recurring = reminder[4]
-            recurrence_type = reminder[5]
-            day_of_week = reminder[6]
-            if is_recurring:
-                # Show weekday selection for recurring reminders
-                # Parse selected days from day_of_week (comma-separated string)
-                all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-                
-                # Map abbreviated day names to full day names
-                day_mapping_reverse = {
-                    'mon': 'monday',
-                    'tue': 'tuesday', 
-                    'wed': 'wednesday',
-                    'thu': 'thursday',
-                    'fri': 'friday',
-                    'sat': 'saturday',
-                    'sun': 'sunday'
-                }
-                
-                if recurrence_type == "daily":
-                    selected_days = all_days
-                else:
-                    # Convert abbreviated day names to full day names
-                    abbreviated_days = day_of_week.split(",")
-                    selected_days = [day_mapping_reverse.get(day, day) for day in abbreviated_days]
-                    logging.info(f"Parsing days for edit: day_of_week='{day_of_week}', abbreviated_days={abbreviated_days}, selected_days={selected_days}")
-                
-                user_edit_context[user_id]["selected_days"] = selected_days
-                user_edit_context[user_id]["step"] = "editing_selecting_days"
-                
-                # Create keyboard with current selections
-                keyboard = []
-                
-                # Check if all days are selected
-                all_selected = all(day in selected_days for day in all_days)
-                
-                # Add "Every day" button
-                if all_selected:
-                    keyboard.append([InlineKeyboardButton("Every day", callback_data="edit_select_all_days")])
-                else:
-                    keyboard.append([InlineKeyboardButton("Every day", callback_data="edit_select_all_days")])
-                
-                # Add individual day buttons with checkmarks for selected days
-                for day in all_days:
-                    if day in selected_days:
-                        keyboard.append([InlineKeyboardButton(f"✅ {day.title()}", callback_data=f"edit_toggle_day:{day}")])
-                    else:
-                        keyboard.append([InlineKeyboardButton(day.title(), callback_data=f"edit_toggle_day:{day}")])
-                
-                # Add action buttons
-                keyboard.append([InlineKeyboardButton("⏰ Set Time", callback_data="edit_set_recurring_time")])
-                keyboard.append([InlineKeyboardButton("Cancel", callback_data="edit_cancel")])
-                
-                # Create selection text
-                if all_selected:
-                    selected_text = "All days"
-                else:
-                    selected_text = ", ".join([day.title() for day in selected_days]) if selected_days else "None"
-                
-                await query.edit_message_text(
-                    f"Select weekdays for your recurring reminder (edit):\n(Click to toggle selection)\n\nSelected: {selected_text}",
-                    reply_markup=InlineKeyboardMarkup(keyboard)
-                )
-                return
-            else:
-                # Show calendar for date selection (one-time reminder)
-                today = datetime.now()
-                keyboard = create_calendar_keyboard(today.year, today.month)
-                
-                try:
-                    # Try to send message with topic support
-                    await context.bot.send_message(
-                        chat_id=query.message.chat.id,
-                        text="Select a date for your reminder:",
-                        reply_markup=keyboard,
-                        message_thread_id=query.message.message_thread_id if hasattr(query.message, 'message_thread_id') and query.message.message_thread_id else None
-                    )
-                    await query.edit_message_text("Edit time - select a date:")
-                except Exception as e:
-                    # If topic fails, send to general chat
-                    await context.bot.send_message(
-                        chat_id=query.message.chat.id,
-                        text="Select a date for your reminder:",
-                        reply_markup=keyboard
-                    )
-                    await query.edit_message_text("Edit time - select a date:")
-                
-                return SELECTING_DATE
+    await query.edit_message_text(title, reply_markup=InlineKeyboardMarkup(keyboard))
+
+async def callback_edit_reminder_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List the user's reminders to pick one to edit"""
+    await show_reminder_picker(update.callback_query, "✏️", "edit_reminder", "edit_cancel", "Select a reminder to edit:", "EDIT")
+
+async def callback_delete_reminder_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List the user's reminders to pick one to delete"""
+    await show_reminder_picker(update.callback_query, "🗑️", "delete_reminder", "delete_cancel", "Select a reminder to delete:", "DELETE")
+
+async def callback_edit_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show a reminder with its edit options"""
+    query = update.callback_query
+    reminder_id = int(query.data.partition(":")[2])
+    user_id = query.from_user.id
+    
+    reminder = await asyncio.to_thread(db.get_reminder_by_id, reminder_id, user_id)
+    if not reminder:
+        await query.edit_message_text("❌ Reminder not found or you don't have permission to edit it.")
+        return
+    
+    # Store edit context
+    context.user_data["edit"] = EditContext(reminder_id, reminder)
+    
+    reminder_id, message, remind_time, timezone, is_recurring, recurrence_type, day_of_week, chat_id, topic_id = reminder
+    
+    # Format the time for display in the reminder's stored timezone
+    try:
+        # Resolve reminder's own timezone for display
+        reminder_tz = get_tz(timezone)
+        if is_recurring:
+            time_display = recurring_time_display(remind_time, reminder_tz)
+        else:
+            # One-time: display using reminder's stored timezone
+            reminder_datetime = stored_datetime(remind_time)
+            if reminder_datetime.tzinfo is None:
+                reminder_datetime = reminder_datetime.replace(tzinfo=reminder_tz)
+            time_display = reminder_datetime.astimezone(reminder_tz).strftime("%Y-%m-%d %H:%M:%S")
+    except Exception as e:
+        time_display = remind_time  # Fallback to original if parsing fails
+        logger.error("Error parsing reminder time for display: %s", e)
+    
+    # Convert IANA timezone to UTC offset for display
+    timezone_display = TZ_TO_UTC_OFFSET.get(timezone, timezone)
     
+    edit_message = f"📝 Editing Reminder {reminder_id}:\n\n"
+    edit_message += f"💬 Message: {message}\n"
+    edit_message += f"⏰ Time: {time_display}\n"
+    edit_message += f"🌍 Timezone: {timezone_display}\n"
+    edit_message += f"🔄 Recurring: {'Yes' if is_recurring else 'No'}\n\n"
+    edit_message += "What would you like to edit?"
+    
+    await query.edit_message_text(edit_message, reply_markup=EDIT_OPTIONS_MARKUP)
+
+async def callback_close_list(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Close the reminder list"""
+    query = update.callback_query
+    await query.answer()
+    await edit_message_once(query, "Reminder list closed.")
+
+async def callback_list_page(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Show another page of /list in place"""
+    query = update.callback_query
+    topic_context, _, offset = query.data.partition(":")[2].rpartition(":")
+    offset = int(offset)
+    reminders = await asyncio.to_thread(get_reminder_list_page, query.from_user.id, query.message.chat.id, topic_context, offset)
+    if not reminders and offset:
+        # Reminders were removed since the list was shown; start over from the first page
+        offset = 0
+        reminders = await asyncio.to_thread(get_reminder_list_page, query.from_user.id, query.message.chat.id, topic_context)
+    if not reminders:
+        await query.edit_message_text("You have no active reminders.")
+        return
+    message, reply_markup = render_reminder_list(reminders, topic_context, offset)
+    await query.edit_message_text(message, reply_markup=reply_markup)
+
+async def callback_edit_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Abandon the edit in progress"""
+    query = update.callback_query
+    await query.answer()
+    context.user_data.pop("edit", None)
+    await edit_message_once(query, "Edit cancelled.")
+
+async def callback_delete_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Close the delete picker"""
+    query = update.callback_query
+    await query.answer()
+    await edit_message_once(query, "Delete cancelled.")
+
+async def callback_edit_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ask for the new message of the reminder being edited"""
+    query = update.callback_query
+    edit_context = context.user_data.get("edit")
+    if edit_context:
+        edit_context.field_to_edit = "message"
+        await query.edit_message_text("Please send the new message for your reminder (max 4000 characters):")
+
+async def callback_edit_time(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Ask for the new time (weekdays or date first) of the reminder being edited"""
+    query = update.callback_query
+    edit_context = context.user_data.get("edit")
+    if edit_context:
+        edit_context.field_to_edit = "time"
+        # Check if this is a recurring reminder
+        is_recurring, recurrence_type, day_of_week = edit_context.current_reminder[4:7]
+        if is_recurring:
+            # Show weekday selection for recurring reminders
+            # Parse selected days from day_of_week (comma-separated string)
+            
+            if recurrence_type == "daily":
+                day_mask = ALL_WEEKDAYS_MASK
+            else:
+                # Convert abbreviated day names to full day names
+                abbreviated_days = day_of_week.split(",")
+                day_mask = weekday_mask(DAY_ABBR_TO_FULL.get(day, day) for day in abbreviated_days)
+                logger.info("Parsing days for edit: day_of_week='%s', abbreviated_days=%s, day_mask=%s", day_of_week, abbreviated_days, day_mask)
+            
+            edit_context.day_mask = day_mask
+            edit_context.step = STEP_EDIT_SELECTING_DAYS
+            selected_days = MASK_WEEKDAYS[day_mask]
+            
+            # Check if all days are selected
+            all_selected = day_mask == ALL_WEEKDAYS_MASK
+            
+            # Create selection text
+            if all_selected:
+                selected_text = "All days"
+            else:
+                selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days) if selected_days else "None"
+            
+            await query.edit_message_text(
+                f"Select weekdays for your recurring reminder (edit):\n(Click to toggle selection)\n\nSelected: {selected_text}",
+                reply_markup=weekday_keyboard_markup(selected_days, edit=True)
+            )
+            return
+        else:
+            # Show calendar for date selection (one-time reminder)
+            today = datetime.now()
+            keyboard = create_calendar_keyboard(today.year, today.month)
+            
+            try:
+                # Try to send message with topic support
+                await context.bot.send_message(
+                    chat_id=query.message.chat.id,
+                    text="Select a date for your reminder:",
+                    reply_markup=keyboard,
+                    message_thread_id=getattr(query.message, 'message_thread_id', None) or None
+                )
+                await query.edit_message_text("Edit time - select a date:")
+            except Exception as e:
+                # If topic fails, send to general chat
+                await context.bot.send_message(
+                    chat_id=query.message.chat.id,
+                    text="Select a date for your reminder:",
+                    reply_markup=keyboard
+                )
+                await query.edit_message_text("Edit time - select a date:")
+            
+            return SELECTING_DATE
 
-    
+async def callback_setoffset(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Save the picked UTC offset as the user's timezone"""
+    query = update.callback_query
+    await query.answer()
+    offset = query.data.partition(":")[2]
+    tz_str = UTC_OFFSET_TO_TZ.get(offset)
+    if tz_str:
+        try:
+            ZoneInfo(tz_str)
+            # Always set timezone for the user, not the group
+            user_timezones[query.from_user.id] = tz_str
+            await asyncio.to_thread(db.save_timezone_preference, query.from_user.id, 'user', tz_str)
+            get_timezone_preference.cache_clear()
+            await query.edit_message_text(f"✅ Your timezone has been set to {offset}.")
+            logger.info("User %s set timezone to %s via offset %s", query.from_user.id, tz_str, offset)
+        except Exception:
+            await query.edit_message_text("Invalid offset selected. Please try again.")
+            logger.error("User %s tried to set invalid offset: %s", query.from_user.id, offset)
+    else:
+        await query.edit_message_text("Unknown offset selected. Please try again.")
+        logger.error("User %s selected unknown offset: %s", query.from_user.id, offset)
 
+async def callback_timezone_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Close the timezone picker"""
+    query = update.callback_query
+    await query.answer()
+    await edit_message_once(query, "Timezone selection cancelled.")
     
-    elif query.data.startswith("setoffset:"):
-        await query.answer()
-        offset = query.data.split(":", 1)[1]
-        tz_str = UTC_OFFSET_TO_TZ.get(offset)
-        if tz_str:
-            try:
-                pytz.timezone(tz_str)
-                # Always set timezone for the user, not the group
-                user_timezones[query.from_user.id] = tz_str
-                db.save_timezone_preference(query.from_user.id, 'user', tz_str)
-                await query.edit_message_text(f"✅ Your timezone has been set to {offset}.")
-                logging.info(f"User {query.from_user.id} set timezone to {tz_str} via offset {offset}")
-            except Exception:
-                await query.edit_message_text("Invalid offset selected. Please try again.")
-                logging.error(f"User {query.from_user.id} tried to set invalid offset: {offset}")
-        else:
-            await query.edit_message_text("Unknown offset selected. Please try again.")
-            logging.error(f"User {query.from_user.id} selected unknown offset: {offset}")
-    
-    elif query.data == "timezone_cancel":
-        await query.answer()
-        await query.edit_message_text("Timezone selection cancelled.")
+
+async def callback_admin_delete_start(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """List the group's reminders for an admin to pick one to delete"""
+    query = update.callback_query
+    await query.answer()
+    # Get all reminders in the group for admin to delete
+    chat_id = query.message.chat.id
     
-    # Admin callback handlers
-    elif query.data.startswith("admin_delete_start:"):
-        await query.answer()
-        # Get all reminders in the group for admin to delete
-        chat_id = query.message.chat.id
-        
-        # Parse topic context from callback data
-        parts = query.data.split(":", 1)
-        if len(parts) == 2:
-            topic_context = parts[1]
-            if topic_context == "all":
-                topic_id = None
-                topic_name = ""
-                logging.info("Callback: Getting ALL reminders (general topic)")
-            elif topic_context.startswith("topic:"):
-                topic_id = int(topic_context.split(":", 1)[1])
-                topic_name = f"Topic #{topic_id}"
-                logging.info(f"Callback: Getting reminders for specific topic {topic_id}")
-            else:
-                # Fallback to old method
-                topic_id, topic_name = await get_topic_info_from_callback(query)
+    # Parse topic context from callback data
+    _, separator, topic_context = query.data.partition(":")
+    if separator:
+        if topic_context == "all":
+            topic_id = None
+            topic_name = ""
+            logger.info("Callback: Getting ALL reminders (general topic)")
+        elif topic_context.startswith("topic:"):
+            topic_id = int(topic_context.partition(":")[2])
+            topic_name = f"Topic #{topic_id}"
+            logger.info("Callback: Getting reminders for specific topic %s", topic_id)
         else:
             # Fallback to old method
-            topic_id, topic_name = await get_topic_info_from_callback(query)
-        
+            topic_id, topic_name = get_topic_info_from_callback(query)
+    else:
+        # Fallback to old method
+        topic_id, topic_name = get_topic_info_from_callback(query)
+    
 
-        
-        # If we're in general topic (topic_id is None or 1), get only general topic reminders
-        # Otherwise, get reminders for specific topic
-        if topic_id is None or topic_id == 1:
-            reminders = db.get_general_topic_reminders(chat_id)  # Only general topic reminders
-            topic_info = " (General Topic)"
-        else:
-            reminders = db.get_all_group_reminders(chat_id, topic_id)  # Specific topic
-            topic_info = f" in {topic_name}"
-        
-        if not reminders:
-            await query.edit_message_text(f"No reminders found{topic_info} to delete.")
-            return
-        
-        # Create keyboard with reminders to delete
-        keyboard = []
-        for reminder in reminders[:20]:  # Limit to 20 reminders
-            reminder_id, user_id, message_text, remind_time, timezone, is_recurring, recurrence_type, day_of_week, topic_id = reminder
-            
-            # Get user info
-            try:
-                user = await context.bot.get_chat_member(chat_id, user_id)
-                user_name = user.user.first_name or user.user.username or f"User {user_id}"
-            except:
-                user_name = f"User {user_id}"
-            
-            # Truncate message if too long
-            if len(message_text) > 30:
-                message_text = message_text[:27] + "..."
-            
-            keyboard.append([InlineKeyboardButton(f"🗑️ {reminder_id}: {user_name} - {message_text}", callback_data=f"admin_delete_reminder:{reminder_id}")])
-        
-        keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="admin_delete_cancel")])
-        
-        await query.edit_message_text(
-            f"🗑️ Select a reminder to delete{topic_info}:",
-            reply_markup=InlineKeyboardMarkup(keyboard)
-        )
     
-    elif query.data == "admin_delete_cancel":
-        await query.answer()
-        await query.edit_message_text("Delete operation cancelled.")
+    # If we're in general topic (topic_id is None or 1), get only general topic reminders
+    # Otherwise, get reminders for specific topic
+    if topic_id is None or topic_id == 1:
+        reminders = await asyncio.to_thread(db.get_general_topic_reminders, chat_id)  # Only general topic reminders
+        topic_info = " (General Topic)"
+    else:
+        reminders = await asyncio.to_thread(db.get_all_group_reminders, chat_id, topic_id)  # Specific topic
+        topic_info = f" in {topic_name}"
     
-    elif query.data.startswith("admin_delete_reminder:"):
-        reminder_id = int(query.data.split(":", 1)[1])
-        chat_id = query.message.chat.id
-        
-        # Get reminder details
-        reminder = db.get_reminder_by_id_admin(reminder_id, chat_id)
-        if not reminder:
-            await query.edit_message_text("❌ Reminder not found.")
-            return
+    if not reminders:
+        await query.edit_message_text(f"No reminders found{topic_info} to delete.")
+        return
+    
+    # Create keyboard with reminders to delete
+    keyboard = []
+    reminders = reminders[:20]  # Limit to 20 reminders
+    user_names = await resolve_user_names(context.bot, chat_id, [reminder[1] for reminder in reminders])
+    for reminder in reminders:
+        reminder_id, user_id, message_text, remind_time, timezone, is_recurring, recurrence_type, day_of_week, topic_id = reminder
+        user_name = user_names[user_id]
         
-        # Get the job IDs before deleting
-        job_ids = db.get_reminder_job_ids(reminder_id)
+        # Truncate message if too long
+        if len(message_text) > 30:
+            message_text = message_text[:27] + "..."
         
-        # Delete the reminder
-        if db.admin_delete_reminder(reminder_id, chat_id):
-            # Remove from scheduler
-            for job_id in job_ids:
-                try:
-                    scheduler.remove_job(job_id)
-                    logging.info(f"Removed job {job_id} for deleted reminder {reminder_id}")
-                except Exception as e:
-                    logging.warning(f"Failed to remove job {job_id} for deleted reminder {reminder_id}: {e}")
-            
-            await query.edit_message_text(f"✅ Reminder {reminder_id} has been deleted by admin.")
-        else:
-            await query.edit_message_text("❌ Failed to delete reminder.")
+        keyboard.append([InlineKeyboardButton(f"🗑️ {reminder_id}: {user_name} - {message_text}", callback_data=f"admin_delete_reminder:{reminder_id}")])
     
-    elif query.data == "admin_close":
+    keyboard.append([InlineKeyboardButton("❌ Cancel", callback_data="admin_delete_cancel")])
+    
+    await query.edit_message_text(
+        f"🗑️ Select a reminder to delete{topic_info}:",
+        reply_markup=InlineKeyboardMarkup(keyboard)
+    )
+
+async def callback_admin_delete_cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Close the admin delete picker"""
+    query = update.callback_query
+    await query.answer()
+    await edit_message_once(query, "Delete operation cancelled.")
+
+async def callback_admin_delete_reminder(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Delete a group reminder as an admin"""
+    query = update.callback_query
+    reminder_id = int(query.data.partition(":")[2])
+    chat_id = query.message.chat.id
+    
+    # Delete the reminder; the delete hands back its job IDs
+    job_ids = await asyncio.to_thread(db.admin_delete_reminder, reminder_id, chat_id)
+    if job_ids is None:
+        await query.edit_message_text("❌ Reminder not found.")
+        return
+    
+    invalidate_user_reminders(chat_id)
+    # Remove from scheduler in one batch
+    await reschedule_jobs(job_ids, [])
+    
+    await query.edit_message_text(f"✅ Reminder {reminder_id} has been deleted by admin.")
+
+async def callback_admin_close(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Close the admin panel"""
+    query = update.callback_query
+    await query.answer()
+    await edit_message_once(query, "Admin panel closed.")
+
+# Callback query handlers keyed by the data before and including the first ":"; keys
+# without a colon only match callback data that is exactly that string
+CALLBACK_HANDLERS = {
+    "remind_type:": callback_remind_type,
+    "select_date:": callback_select_date,
+    "select_all_days": callback_select_all_days,
+    "toggle_day:": callback_toggle_day,
+    "set_recurring_time": callback_set_recurring_time,
+    "edit_select_all_days": callback_edit_select_all_days,
+    "edit_toggle_day:": callback_edit_toggle_day,
+    "edit_set_recurring_time": callback_edit_set_recurring_time,
+    "recurring_cancel": callback_recurring_cancel,
+    "one_time_cancel": callback_one_time_cancel,
+    "calendar:": callback_calendar,
+    "delete_reminder:": callback_delete_reminder,
+    "edit_reminder_start:": callback_edit_reminder_start,
+    "delete_reminder_start:": callback_delete_reminder_start,
+    "edit_reminder:": callback_edit_reminder,
+    "close_list": callback_close_list,
+    "list_page:": callback_list_page,
+    "edit_cancel": callback_edit_cancel,
+    "delete_cancel": callback_delete_cancel,
+    "edit_message": callback_edit_message,
+    "edit_time": callback_edit_time,
+    "setoffset:": callback_setoffset,
+    "timezone_cancel": callback_timezone_cancel,
+    "admin_delete_start:": callback_admin_delete_start,
+    "admin_delete_cancel": callback_admin_delete_cancel,
+    "admin_delete_reminder:": callback_admin_delete_reminder,
+    "admin_close": callback_admin_close,
+}
+
+async def reminder_button(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    query = update.callback_query
+    
+    try:
         await query.answer()
-        await query.edit_message_text("Admin panel closed.")
+    except Exception as e:
+        logger.warning("Failed to answer callback query: %s", e)
+        # Continue processing even if answer fails
     
-    else:
-        await query.edit_message_text("Invalid selection. Please try again.")
-        logging.error(f"User {query.from_user.id} made an invalid selection: {query.data}")
+    action, separator, _ = query.data.partition(":")
+    handler = CALLBACK_HANDLERS.get(action + separator)
+    if handler is None:
+        await edit_message_once(query, "Invalid selection. Please try again.")
+        logger.error("User %s made an invalid selection: %s", query.from_user.id, query.data)
+        return
+    return await handler(update, context)
 
 async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    user_id = update.effective_user.id
-    if user_id in user_reminder_context:
-        del user_reminder_context[user_id]
-    if user_id in user_edit_context:
-        del user_edit_context[user_id]
+    context.user_data.pop("reminder", None)
+    context.user_data.pop("edit", None)
     await update.message.reply_text("Operation cancelled.")
     return
 
+# Telegram lets a bot send about 30 messages per second across all chats
+SEND_RATE_LIMIT = 30
+next_send_slot = 0.0
+
+async def wait_for_send_slot():
+    """Space outgoing reminders 1/SEND_RATE_LIMIT seconds apart across all chats"""
+    global next_send_slot
+    now = time.monotonic()
+    slot = max(next_send_slot, now)
+    next_send_slot = slot + 1 / SEND_RATE_LIMIT
+    if slot > now:
+        await asyncio.sleep(slot - now)
+
+# Chats Telegram asked us to back off from: chat_id -> monotonic time before which nothing is sent
+chat_cooldowns = {}
+
+def retry_delay(attempt):
+    """Exponential backoff with jitter so retries from many chats do not line up"""
+    return REMINDER_RETRY_DELAY_BASE ** attempt * (0.5 + random.random())
+
+async def wait_for_chat_cooldown(chat_id):
+    """Sleep until the chat's cooldown, if any, has passed"""
+    remaining = chat_cooldowns.get(chat_id, 0) - time.monotonic()
+    if remaining > 0:
+        await asyncio.sleep(remaining)
+
 async def send_reminder(chat_id: int, message: str, reminder_id=None, topic_id=None, max_retries=None):
     if max_retries is None:
         max_retries = REMINDER_MAX_RETRIES
@@ -2294,206 +2039,244 @@ async def send_reminder(chat_id: int, message: str, reminder_id=None, topic_id=N
     Send reminder with retry mechanism and exponential backoff.
     Returns True if successful, False if all retries failed.
     """
-    logging.info(f"Sending reminder to chat_id={chat_id} topic_id={topic_id} (type: {'group' if str(chat_id).startswith('-') else 'private'}): {message}")
+    logger.info("Sending reminder to chat_id=%s topic_id=%s (type: %s): %s", chat_id, topic_id, 'group' if chat_id < 0 else 'private', message)
     
     for attempt in range(max_retries):
         try:
+            await wait_for_chat_cooldown(chat_id)
+            await wait_for_send_slot()
             if topic_id is not None:
                 # Send to specific topic
                 await main_application.bot.send_message(chat_id=chat_id, text=message, message_thread_id=topic_id)
-                logging.info(f"Reminder sent to chat_id={chat_id} topic_id={topic_id}")
+                logger.info("Reminder sent to chat_id=%s topic_id=%s", chat_id, topic_id)
             else:
                 # Send to general chat
                 await main_application.bot.send_message(chat_id=chat_id, text=message)
-                logging.info(f"Reminder sent to chat_id={chat_id}")
+                logger.info("Reminder sent to chat_id=%s", chat_id)
             
+            chat_cooldowns.pop(chat_id, None)
             # Success - mark as sent
             if reminder_id is not None:
-                db.mark_reminder_sent(reminder_id)
+                await asyncio.to_thread(db.mark_reminder_sent, reminder_id)
+                invalidate_user_reminders(chat_id)
             return True
             
+        except (RetryAfter, TimedOut) as e:
+            # Flood control says exactly how long to wait; a timeout gets the usual backoff
+            delay = e.retry_after if isinstance(e, RetryAfter) else retry_delay(attempt)
+            chat_cooldowns[chat_id] = time.monotonic() + delay
+            logger.warning("Attempt %s/%s for reminder %s to chat_id=%s throttled (%s); holding the chat for %.1f seconds", attempt + 1, max_retries, reminder_id, chat_id, e, delay)
+            if attempt == max_retries - 1:
+                logger.error("All %s attempts failed for reminder %s to chat_id=%s topic_id=%s", max_retries, reminder_id, chat_id, topic_id)
+                return False
         except BadRequest as e:
             if "Topic_closed" in str(e):
-                logging.error(f"Topic closed error for reminder {reminder_id} to chat_id={chat_id} topic_id={topic_id}: {e}")
+                logger.error("Topic closed error for reminder %s to chat_id=%s topic_id=%s: %s", reminder_id, chat_id, topic_id, e)
                 # Don't retry for topic closed errors - the topic is permanently closed
                 return False
             else:
-                logging.error(f"BadRequest error for reminder {reminder_id} to chat_id={chat_id} topic_id={topic_id}: {e}")
+                logger.error("BadRequest error for reminder %s to chat_id=%s topic_id=%s: %s", reminder_id, chat_id, topic_id, e)
                 if attempt < max_retries - 1:
-                    # Calculate exponential backoff delay: base^attempt seconds
-                    delay = REMINDER_RETRY_DELAY_BASE ** attempt
-                    logging.info(f"Retrying in {delay} seconds...")
+                    delay = retry_delay(attempt)
+                    logger.info("Retrying in %.1f seconds...", delay)
                     await asyncio.sleep(delay)
                 else:
                     # Final attempt failed
-                    logging.error(f"All {max_retries} attempts failed for reminder {reminder_id} to chat_id={chat_id} topic_id={topic_id}")
+                    logger.error("All %s attempts failed for reminder %s to chat_id=%s topic_id=%s", max_retries, reminder_id, chat_id, topic_id)
                     return False
         except Exception as e:
-            logging.error(f"Attempt {attempt + 1}/{max_retries} failed for reminder {reminder_id} to chat_id={chat_id} topic_id={topic_id}: {e}")
+            logger.error("Attempt %s/%s failed for reminder %s to chat_id=%s topic_id=%s: %s", attempt + 1, max_retries, reminder_id, chat_id, topic_id, e)
             
             if attempt < max_retries - 1:
-                # Calculate exponential backoff delay: base^attempt seconds
-                delay = REMINDER_RETRY_DELAY_BASE ** attempt
-                logging.info(f"Retrying in {delay} seconds...")
+                delay = retry_delay(attempt)
+                logger.info("Retrying in %.1f seconds...", delay)
                 await asyncio.sleep(delay)
             else:
                 # Final attempt failed
-                logging.error(f"All {max_retries} attempts failed for reminder {reminder_id} to chat_id={chat_id} topic_id={topic_id}")
+                logger.error("All %s attempts failed for reminder %s to chat_id=%s topic_id=%s", max_retries, reminder_id, chat_id, topic_id)
                 return False
     
     return False
 
-def schedule_reminder(chat_id: int, message: str, reminder_time, reminder_id=None, topic_id=None):
-    global main_event_loop
-    logging.info(f"schedule_reminder called for chat_id={chat_id} topic_id={topic_id} at {reminder_time} with message: {message}")
+# Reminders due in the same chat are sent one at a time in the order they fired,
+# each chat by its own worker, so a chat that is retrying does not hold up the others
+chat_send_queues = {}  # chat_id -> asyncio.Queue of (message, reminder_id, topic_id)
+chat_send_tasks = set()
+
+async def chat_send_worker(chat_id, queue):
+    """Send a chat's queued reminders in order; the worker exits once its queue is drained"""
     try:
-        if main_event_loop is not None:
-            # Create a coroutine that handles the result
-            async def send_with_result():
+        while not queue.empty():
+            message, reminder_id, topic_id = queue.get_nowait()
+            try:
                 success = await send_reminder(chat_id, message, reminder_id, topic_id)
                 if not success:
-                    logging.error(f"Reminder {reminder_id} failed to send after all retries")
+                    logger.error("Reminder %s failed to send after all retries", reminder_id)
                     # Could add additional handling here (e.g., notify admin, store in failed queue)
-            
-            asyncio.run_coroutine_threadsafe(
-                send_with_result(),
-                main_event_loop
-            )
-        else:
-            logging.error("Main event loop is not set!")
-    except Exception as e:
-        logging.error(f"Failed to schedule reminder for chat_id={chat_id}: {e}")
+            except Exception as e:
+                logger.error("Failed to send reminder for chat_id=%s: %s", chat_id, e)
+    finally:
+        chat_send_queues.pop(chat_id, None)
+
+def enqueue_reminder(chat_id, message, reminder_id, topic_id):
+    """Queue a due reminder for its chat, starting the chat's worker if it is idle"""
+    queue = chat_send_queues.get(chat_id)
+    if queue is None:
+        queue = chat_send_queues[chat_id] = asyncio.Queue()
+        task = asyncio.create_task(chat_send_worker(chat_id, queue))
+        chat_send_tasks.add(task)
+        task.add_done_callback(chat_send_tasks.discard)
+    queue.put_nowait((message, reminder_id, topic_id))
+
+async def schedule_reminder(chat_id: int, message: str, reminder_time, reminder_id=None, topic_id=None):
+    logger.info("schedule_reminder called for chat_id=%s topic_id=%s at %s with message: %s", chat_id, topic_id, reminder_time, message)
+    enqueue_reminder(chat_id, message, reminder_id, topic_id)
 
 def load_and_reschedule_pending_reminders(application):
     pending = db.get_pending_reminders()
+    # Ids of the jobs the persistent store restored, fetched once for the whole loop
+    stored_job_ids = {job.id for job in scheduler.get_jobs()}
+    # Job id changes are written back together once every row has been scheduled
+    pending_updates = []
+    stale_job_ids = []
+    now_utc = datetime.now(UTC)
     for row in pending:
         reminder_id, user_id, chat_id, message, remind_time, timezone, is_recurring, recurrence_type, day_of_week, topic_id, job_id = row
         try:
-            chat_id = int(chat_id)
-            
             if is_recurring:
                 # Handle recurring reminders
-                try:
-                    tz = pytz.timezone(timezone)
-                except Exception:
-                    tz = pytz.UTC
+                tz = get_tz(timezone)
                 
                 # If jobs already exist in persistent store, skip rescheduling
                 if recurrence_type == 'daily':
-                    if job_id and scheduler.get_job(job_id):
-                        logging.info(f"Skipping reschedule for recurring daily reminder {reminder_id}; job already exists")
+                    if job_id and job_id in stored_job_ids:
+                        logger.info("Skipping reschedule for recurring daily reminder %s; job already exists", reminder_id)
                         continue
                 elif recurrence_type == 'weekly':
-                    existing_job_ids = db.get_reminder_job_ids(reminder_id) if job_id else []
-                    day_abbrevs_expected = day_of_week.split(',') if day_of_week and ',' in day_of_week else ([day_of_week] if day_of_week else [])
-                    if existing_job_ids:
-                        all_exist = all(scheduler.get_job(jid) is not None for jid in existing_job_ids)
-                        # If we have as many existing jobs as expected days and they all exist, skip
-                        if all_exist and (len(existing_job_ids) == len(day_abbrevs_expected) if day_abbrevs_expected else True):
-                            logging.info(f"Skipping reschedule for recurring weekly reminder {reminder_id}; jobs already exist")
-                            continue
+                    # One job covers all days; reminders created before that may still own one job per day
+                    if job_id and all(jid in stored_job_ids for jid in job_id.split(',')):
+                        logger.info("Skipping reschedule for recurring weekly reminder %s; jobs already exist", reminder_id)
+                        continue
 
                 # Extract hour and minute for recurring reminders from either a time string or a datetime
                 try:
-                    if isinstance(remind_time, str):
-                        time_str = remind_time.strip()
-                        try:
-                            # Try ISO first
-                            rt_dt = dateutil.parser.isoparse(time_str)
-                        except Exception:
-                            # Fallback to generic time parsing (handles HH:MM, HH:MM:SS, and AM/PM)
-                            # Use today's date as default; tz-aware not needed for hour/minute extraction
-                            rt_dt = dateutil.parser.parse(time_str)
-                        hour, minute = rt_dt.hour, rt_dt.minute
-                    else:
-                        # Datetime object returned by DB driver
-                        hour, minute = remind_time.hour, remind_time.minute
+                    hour, minute = stored_hour_minute(remind_time)
                 except Exception as e:
-                    logging.error(f"Failed to parse recurring remind_time for reminder {reminder_id}: {e}")
+                    logger.error("Failed to parse recurring remind_time for reminder %s: %s", reminder_id, e)
                     continue
                 
-                if recurrence_type == 'daily':
-                    # Daily recurring reminder
-                    job = scheduler.add_job(
-                        schedule_reminder,
-                        'cron',
-                        hour=hour, minute=minute, timezone=tz,
-                        args=[application, chat_id, message, None, reminder_id, topic_id]
-                    )
-                    # Store the new job ID if changed/missing
-                    if not job_id or job_id != job.id:
-                        db.update_reminder(reminder_id, user_id, job_id=job.id)
-                elif recurrence_type == 'weekly':
-                    # Weekly recurring reminder
-                    if ',' in day_of_week:
-                        # Multiple weekdays - create multiple jobs
-                        day_abbrevs = day_of_week.split(',')
-                        job_ids = []
-                        for day_abbrev in day_abbrevs:
-                            job = scheduler.add_job(
-                                schedule_reminder,
-                                'cron',
-                                day_of_week=day_abbrev, hour=hour, minute=minute, timezone=tz,
-                                args=[chat_id, message, None, reminder_id, topic_id]
-                            )
-                            job_ids.append(job.id)
-                        # Store multiple job IDs
-                        db.update_reminder(reminder_id, user_id, job_id=','.join(job_ids))
-                    else:
-                        # Single weekday
-                        job = scheduler.add_job(
-                            schedule_reminder,
-                            'cron',
-                            day_of_week=day_of_week, hour=hour, minute=minute, timezone=tz,
-                            args=[chat_id, message, None, reminder_id, topic_id]
-                        )
-                        # Store the new job ID
-                        if not job_id or job_id != job.id:
-                            db.update_reminder(reminder_id, user_id, job_id=job.id)
-                logging.info(f"Rescheduled recurring reminder {reminder_id} for chat_id={chat_id} topic_id={topic_id}")
+                # One cron job covers every selected weekday. Rows from before that may
+                # list one job per day; any of those still stored give way to the single job
+                new_job_id = job_id if job_id and ',' not in job_id else uuid.uuid4().hex
+                specs = recurring_job_specs(reminder_id, chat_id, message, hour, minute, tz, topic_id, recurrence_type, day_of_week, new_job_id)
+                if not specs:
+                    logger.warning("Unknown recurrence type %r for reminder %s", recurrence_type, reminder_id)
+                    continue
+                if job_id and ',' in job_id:
+                    stale_job_ids.extend(jid for jid in job_id.split(',') if jid in stored_job_ids)
+                for trigger, trigger_args, job_args in specs:
+                    scheduler.add_job(schedule_reminder, trigger, args=job_args, replace_existing=True, **trigger_args)
+                if new_job_id != job_id:
+                    pending_updates.append((reminder_id, user_id, new_job_id))
+                logger.info("Rescheduled recurring reminder %s for chat_id=%s topic_id=%s", reminder_id, chat_id, topic_id)
                 
             else:
                 # Handle one-time reminders
                 # Parse the stored time which may be a datetime or an ISO string
-                if isinstance(remind_time, str):
-                    reminder_time = dateutil.parser.isoparse(remind_time)
-                else:
-                    reminder_time = remind_time
+                reminder_time = stored_datetime(remind_time)
                 # Only reschedule if the time is still in the future
-                if reminder_time > datetime.now(reminder_time.tzinfo):
-                    # Remove old job if it exists
-                    if job_id:
-                        # Only remove if it exists (persistent store may already have it)
-                        existing = scheduler.get_job(job_id)
-                        if existing:
-                            try:
-                                scheduler.remove_job(job_id)
-                                logging.info(f"Removed old job {job_id} for reminder {reminder_id}")
-                            except Exception as e:
-                                logging.warning(f"Failed to remove old job {job_id}: {e}")
-                    
-                    # Add new job
-                    # Avoid duplicate if job with same id already exists
-                    job = scheduler.add_job(
+                if reminder_time > now_utc:
+                    # Re-add under the stored id; replace_existing swaps out any job the
+                    # persistent store still holds, and the row only changes when it had no id
+                    new_job_id = job_id or uuid.uuid4().hex
+                    scheduler.add_job(
                         schedule_reminder,
                         'date',
+                        id=new_job_id, replace_existing=True,
                         run_date=reminder_time,
                         args=[chat_id, message, reminder_time, reminder_id, topic_id]
                     )
-                    # Update job ID in database
-                    db.update_reminder(reminder_id, user_id, job_id=job.id)
-                    logging.info(f"Rescheduled reminder {reminder_id} for chat_id={chat_id} topic_id={topic_id} at {reminder_time}")
+                    if new_job_id != job_id:
+                        pending_updates.append((reminder_id, user_id, new_job_id))
+                    logger.info("Rescheduled reminder %s for chat_id=%s topic_id=%s at %s", reminder_id, chat_id, topic_id, reminder_time)
                 else:
-                    logging.info(f"Skipped past reminder {reminder_id} for chat_id={chat_id} at {reminder_time}")
+                    logger.info("Skipped past reminder %s for chat_id=%s at %s", reminder_id, chat_id, reminder_time)
                     
         except Exception as e:
-            logging.error(f"Failed to reschedule reminder {reminder_id}: {e}")
+            logger.error("Failed to reschedule reminder %s: %s", reminder_id, e)
+    for stale_job_id in stale_job_ids:
+        try:
+            scheduler.remove_job(stale_job_id)
+        except JobLookupError:
+            pass
+        except Exception as e:
+            logger.error("Failed to remove superseded per-day job %s: %s", stale_job_id, e)
+    if pending_updates:
+        try:
+            db.bulk_update_reminder_job_ids(pending_updates)
+        except Exception as e:
+            logger.error("Failed to store job ids for %s rescheduled reminders: %s", len(pending_updates), e)
+
+# /list shows this many reminders per page; further pages are reached with inline buttons
+LIST_PAGE_SIZE = 20
+
+def get_reminder_list_page(user_id, chat_id, topic_context, offset=0):
+    """One page of /list rows for a topic context ("all", "general" or "topic_<id>")"""
+    if topic_context == "all":
+        return db.get_user_reminders_formatted(user_id, chat_id, limit=LIST_PAGE_SIZE, offset=offset)
+    if topic_context.startswith("topic_"):
+        return db.get_user_reminders_formatted(user_id, chat_id, int(topic_context[6:]), limit=LIST_PAGE_SIZE, offset=offset)
+    return db.get_user_reminders_formatted(user_id, chat_id, general_only=True, limit=LIST_PAGE_SIZE, offset=offset)
+
+def render_reminder_list(reminders, topic_context, offset=0):
+    """Text and buttons for one page of /list rows"""
+    show_all_topics = topic_context == "all"
+    total = reminders[0][8]
+    
+    # Times come back from the database already rendered in each reminder's own timezone
+    
+    if show_all_topics:
+        parts = ["📋 Your active reminders in this group"]
+    elif topic_context.startswith("topic_"):
+        parts = [f"📋 Your active reminders in Topic #{topic_context[6:]}"]
+    else:
+        parts = ["📋 Your active reminders"]
+    if total > LIST_PAGE_SIZE:
+        parts.append(f" ({offset + 1}-{offset + len(reminders)} of {total})")
+    parts.append(":\n\n")
+    
+    for reminder in reminders:
+        reminder_id, msg, display_time, display_datetime, is_recurring, recurrence_type, day_of_week, reminder_topic_id, _ = reminder
+        
+        if not is_recurring:
+            time_display = display_datetime
+        elif recurrence_type == 'daily':
+            time_display = f"Every day at {display_time}"
+        elif recurrence_type == 'weekly':
+            time_display = f"Every {day_of_week.title()} at {display_time}"
+        else:
+            time_display = f"Recurring: {display_time}"
+        
+        reminder_type = "🔄" if is_recurring else "⏰"
+        parts.append(f"{reminder_type} ID: {reminder_id}\n📅 {time_display}\n💬 {msg[:50]}{'...' if len(msg) > 50 else ''}\n")
+        
+        # Add topic information when showing all reminders
+        if show_all_topics and reminder_topic_id is not None:
+            parts.append(f"📌 Topic #{reminder_topic_id}\n")
+        elif show_all_topics and reminder_topic_id is None:
+            parts.append("📌 General\n")
+        
+        parts.append("\n")
+    
+    prev_offset = max(offset - LIST_PAGE_SIZE, 0) if offset > 0 else None
+    next_offset = offset + LIST_PAGE_SIZE if offset + LIST_PAGE_SIZE < total else None
+    return "".join(parts), list_actions_markup(topic_context, prev_offset, next_offset)
 
 async def list_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """List all active reminders for the user"""
     user_id = update.message.from_user.id  # Use the actual user who sent the command
     chat_id = update.effective_chat.id
-    topic_id, topic_name = await get_topic_info(update, context)
+    topic_id, topic_name = get_topic_info(update, context)
     
     # Check if this is an anonymous message (sent as group)
     if update.message.from_user.is_bot and update.message.from_user.username == 'GroupAnonymousBot':
@@ -2507,110 +2290,23 @@ async def list_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
     
-
-    
     # Check if user wants to see all topics or just current topic
-    show_all_topics = context.args and context.args[0].lower() == 'all'
-    
-    if show_all_topics:
-        # Get reminders for all topics in the chat
-        reminders = db.get_user_reminders(user_id, chat_id)
-        if not reminders:
-            await update.message.reply_text("You have no active reminders in this group.")
-            return
-    else:
-        # Get reminders for current topic only
-        if topic_id is None or topic_id == 1:
-            # Get only general topic reminders
-            reminders = db.get_user_general_topic_reminders(user_id, chat_id)
-        else:
-            # Get reminders for specific topic
-            reminders = db.get_user_reminders(user_id, chat_id, topic_id)
-        
-        if not reminders:
-            topic_info = f" in {topic_name}" if topic_id and topic_id != 1 else ""
-            await update.message.reply_text(f"You have no active reminders{topic_info}.")
-            return
-    
-    # Note: For listing, we display each reminder in its own stored timezone, not the user's current timezone
-    # So we won't compute a single tz for the whole list here.
-    
-    if show_all_topics:
-        message = "📋 Your active reminders in this group:\n\n"
-    else:
-        topic_info = f" in {topic_name}" if topic_id and topic_name else ""
-        message = f"📋 Your active reminders{topic_info}:\n\n"
-    
-    for reminder in reminders:
-        reminder_id, msg, remind_time, timezone, is_recurring, recurrence_type, day_of_week, is_sent, reminder_topic_id = reminder
-        
-        # Parse the reminder time
-        try:
-            if is_recurring:
-                # Display time in the reminder's own timezone (HH:MM)
-                try:
-                    tz_reminder = pytz.timezone(timezone)
-                except Exception:
-                    tz_reminder = pytz.UTC
-                if isinstance(remind_time, str):
-                    try:
-                        reminder_dt = dateutil.parser.isoparse(remind_time)
-                    except Exception:
-                        reminder_dt = dateutil.parser.parse(remind_time)
-                else:
-                    reminder_dt = remind_time
-                if reminder_dt.tzinfo is None:
-                    reminder_dt = tz_reminder.localize(reminder_dt)
-                display_time = reminder_dt.astimezone(tz_reminder).strftime("%H:%M")
-                
-                if recurrence_type == 'daily':
-                    time_display = f"Every day at {display_time}"
-                elif recurrence_type == 'weekly':
-                    time_display = f"Every {day_of_week.title()} at {display_time}"
-                else:
-                    time_display = f"Recurring: {display_time}"
-            else:
-                # One-time: display in the reminder's own timezone
-                try:
-                    tz_reminder = pytz.timezone(timezone)
-                except Exception:
-                    tz_reminder = pytz.UTC
-                if isinstance(remind_time, str):
-                    reminder_datetime = dateutil.parser.isoparse(remind_time)
-                else:
-                    reminder_datetime = remind_time
-                if reminder_datetime.tzinfo is None:
-                    reminder_datetime = tz_reminder.localize(reminder_datetime)
-                time_display = reminder_datetime.astimezone(tz_reminder).strftime("%Y-%m-%d %H:%M")
-        except Exception as e:
-            time_display = remind_time
-            logging.error(f"Error parsing reminder time: {e}")
-        
-        reminder_type = "🔄" if is_recurring else "⏰"
-        message += f"{reminder_type} ID: {reminder_id}\n"
-        message += f"📅 {time_display}\n"
-        message += f"💬 {msg[:50]}{'...' if len(msg) > 50 else ''}\n"
-        
-        # Add topic information when showing all reminders
-        if show_all_topics and reminder_topic_id is not None:
-            message += f"📌 Topic #{reminder_topic_id}\n"
-        elif show_all_topics and reminder_topic_id is None:
-            message += f"📌 General\n"
-        
-        message += "\n"
-    
-    # Add action buttons with topic context
-    keyboard = []
-    if show_all_topics:
+    if context.args and context.args[0].lower() == 'all':
         # For "all" view, use "all" context for edit/delete buttons
         topic_context = "all"
     else:
         topic_context = f"topic_{topic_id}" if topic_id else "general"
-    keyboard.append([InlineKeyboardButton("✏️ Edit a reminder", callback_data=f"edit_reminder_start:{topic_context}")])
-    keyboard.append([InlineKeyboardButton("🗑️ Delete a reminder", callback_data=f"delete_reminder_start:{topic_context}")])
-    keyboard.append([InlineKeyboardButton("❌ Close", callback_data="close_list")])
     
-    reply_markup = InlineKeyboardMarkup(keyboard)
+    reminders = await asyncio.to_thread(get_reminder_list_page, user_id, chat_id, topic_context)
+    if not reminders:
+        if topic_context == "all":
+            await update.message.reply_text("You have no active reminders in this group.")
+        else:
+            topic_info = f" in {topic_name}" if topic_id else ""
+            await update.message.reply_text(f"You have no active reminders{topic_info}.")
+        return
+    
+    message, reply_markup = render_reminder_list(reminders, topic_context)
     try:
         await update.message.reply_text(message, reply_markup=reply_markup)
     except BadRequest as e:
@@ -2647,10 +2343,10 @@ async def delete_reminder_command(update: Update, context: ContextTypes.DEFAULT_
         reminder_id = int(context.args[0])
         user_id = update.message.from_user.id  # Use the actual user who sent the command
         chat_id = update.effective_chat.id
-        topic_id, topic_name = await get_topic_info(update, context)
+        topic_id, topic_name = get_topic_info(update, context)
         
         # First check if the reminder exists and belongs to the user
-        reminder = db.get_reminder_by_id(reminder_id, user_id)
+        reminder = await asyncio.to_thread(db.get_reminder_by_id, reminder_id, user_id)
         if not reminder:
             await update.message.reply_text("❌ Reminder not found or you don't have permission to delete it.")
             return
@@ -2661,17 +2357,12 @@ async def delete_reminder_command(update: Update, context: ContextTypes.DEFAULT_
             await update.message.reply_text(f"❌ Reminder {reminder_id} not found in this chat.")
             return
         
-        # Get the job IDs before deleting
-        preselected_job_ids = db.get_reminder_job_ids(reminder_id)
-        
-        if db.delete_reminder(reminder_id, user_id):
-            # Remove from scheduler
-            for job_id in preselected_job_ids:
-                try:
-                    scheduler.remove_job(job_id)
-                    logging.info(f"Removed job {job_id} for deleted reminder {reminder_id}")
-                except Exception as e:
-                    logging.warning(f"Failed to remove job {job_id} for deleted reminder {reminder_id}: {e}")
+        # The delete hands back the reminder's job IDs
+        preselected_job_ids = await asyncio.to_thread(db.delete_reminder, reminder_id, user_id)
+        if preselected_job_ids is not None:
+            invalidate_user_reminders(chat_id)
+            # Remove from scheduler in one batch
+            await reschedule_jobs(preselected_job_ids, [])
             
             await update.message.reply_text(f"✅ Reminder {reminder_id} has been deleted.")
         else:
@@ -2707,9 +2398,9 @@ async def edit_reminder_command(update: Update, context: ContextTypes.DEFAULT_TY
         reminder_id = int(context.args[0])
         user_id = update.message.from_user.id  # Use the actual user who sent the command
         chat_id = update.effective_chat.id
-        topic_id, topic_name = await get_topic_info(update, context)
+        topic_id, topic_name = get_topic_info(update, context)
         
-        reminder = db.get_reminder_by_id(reminder_id, user_id)
+        reminder = await asyncio.to_thread(db.get_reminder_by_id, reminder_id, user_id)
         if not reminder:
             await update.message.reply_text("❌ Reminder not found or you don't have permission to edit it.")
             return
@@ -2721,55 +2412,26 @@ async def edit_reminder_command(update: Update, context: ContextTypes.DEFAULT_TY
             return
         
         # Store edit context
-        user_edit_context[user_id] = {
-            "reminder_id": reminder_id,
-            "current_reminder": reminder
-        }
-        
-        # Show edit options
-        keyboard = [
-            [InlineKeyboardButton("✏️ Edit Message", callback_data="edit_message")],
-            [InlineKeyboardButton("⏰ Edit Time", callback_data="edit_time")],
-            [InlineKeyboardButton("❌ Cancel", callback_data="edit_cancel")]
-        ]
+        context.user_data["edit"] = EditContext(reminder_id, reminder)
         
         reminder_id, message, remind_time, timezone, is_recurring, recurrence_type, day_of_week, chat_id, topic_id = reminder
         
         # Format the time for display in the reminder's stored timezone
         try:
-            try:
-                reminder_tz = pytz.timezone(timezone)
-            except Exception:
-                reminder_tz = pytz.UTC
+            reminder_tz = get_tz(timezone)
             if is_recurring:
-                if isinstance(remind_time, str):
-                    try:
-                        reminder_dt = dateutil.parser.isoparse(remind_time)
-                    except Exception:
-                        reminder_dt = dateutil.parser.parse(remind_time)
-                else:
-                    reminder_dt = remind_time
-                if reminder_dt.tzinfo is None:
-                    reminder_dt = reminder_tz.localize(reminder_dt)
-                time_display = reminder_dt.astimezone(reminder_tz).strftime("%H:%M")
+                time_display = recurring_time_display(remind_time, reminder_tz)
             else:
-                if isinstance(remind_time, str):
-                    reminder_datetime = dateutil.parser.isoparse(remind_time)
-                else:
-                    reminder_datetime = remind_time
+                reminder_datetime = stored_datetime(remind_time)
                 if reminder_datetime.tzinfo is None:
-                    reminder_datetime = reminder_tz.localize(reminder_datetime)
+                    reminder_datetime = reminder_datetime.replace(tzinfo=reminder_tz)
                 time_display = reminder_datetime.astimezone(reminder_tz).strftime("%Y-%m-%d %H:%M:%S")
         except Exception as e:
             time_display = remind_time  # Fallback to original if parsing fails
-            logging.error(f"Error parsing reminder time for display: {e}")
+            logger.error("Error parsing reminder time for display: %s", e)
         
         # Convert IANA timezone to UTC offset for display
-        timezone_display = timezone
-        for offset, tz_name in UTC_OFFSET_TO_TZ.items():
-            if tz_name == timezone:
-                timezone_display = offset
-                break
+        timezone_display = TZ_TO_UTC_OFFSET.get(timezone, timezone)
         
         edit_message = f"📝 Editing Reminder {reminder_id}:\n\n"
         edit_message += f"💬 Message: {message}\n"
@@ -2778,8 +2440,7 @@ async def edit_reminder_command(update: Update, context: ContextTypes.DEFAULT_TY
         edit_message += f"🔄 Recurring: {'Yes' if is_recurring else 'No'}\n\n"
         edit_message += "What would you like to edit?"
         
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(edit_message, reply_markup=reply_markup)
+        await update.message.reply_text(edit_message, reply_markup=EDIT_OPTIONS_MARKUP)
         
         return EDITING_REMINDER
         
@@ -2792,121 +2453,84 @@ async def handle_edit_selection(update: Update, context: ContextTypes.DEFAULT_TY
     query = update.callback_query
     await query.answer()
     
-    user_id = query.from_user.id
-    
+    edit_context = context.user_data.get("edit")
     if query.data == "edit_message":
-        user_edit_context[user_id]["field_to_edit"] = "message"
+        edit_context.field_to_edit = "message"
         await query.edit_message_text("Please send the new message for your reminder (max 4000 characters):")
         return ENTERING_MESSAGE
     
     elif query.data == "edit_time":
-        user_edit_context[user_id]["field_to_edit"] = "time"
+        edit_context.field_to_edit = "time"
         # Check if this is a recurring reminder
-        reminder = user_edit_context[user_id]["current_reminder"]
-        is_recurring = reminder[4]
-        recurrence_type = reminder[5]
-        day_of_week = reminder[6]
+        is_recurring, recurrence_type, day_of_week = edit_context.current_reminder[4:7]
         if is_recurring:
             # Show weekday selection for recurring reminders
             # Parse selected days from day_of_week (comma-separated string)
-            all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
-            
-            # Map abbreviated day names to full day names
-            day_mapping_reverse = {
-                'mon': 'monday',
-                'tue': 'tuesday', 
-                'wed': 'wednesday',
-                'thu': 'thursday',
-                'fri': 'friday',
-                'sat': 'saturday',
-                'sun': 'sunday'
-            }
             
             if recurrence_type == "daily":
-                selected_days = all_days
+                day_mask = ALL_WEEKDAYS_MASK
             else:
                 # Convert abbreviated day names to full day names
                 abbreviated_days = day_of_week.split(",")
-                selected_days = [day_mapping_reverse.get(day, day) for day in abbreviated_days]
-            user_edit_context[user_id]["selected_days"] = selected_days
-            user_edit_context[user_id]["step"] = "editing_selecting_days"
-            
-            # Create keyboard with current selections
-            keyboard = []
-            all_days = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+                day_mask = weekday_mask(DAY_ABBR_TO_FULL.get(day, day) for day in abbreviated_days)
+            edit_context.day_mask = day_mask
+            edit_context.step = STEP_EDIT_SELECTING_DAYS
+            selected_days = MASK_WEEKDAYS[day_mask]
             
             # Check if all days are selected
-            all_selected = all(day in selected_days for day in all_days)
-            
-            # Add "Every day" button
-            if all_selected:
-                keyboard.append([InlineKeyboardButton("Every day", callback_data="edit_select_all_days")])
-            else:
-                keyboard.append([InlineKeyboardButton("Every day", callback_data="edit_select_all_days")])
-            
-            # Add individual day buttons with checkmarks for selected days
-            for day in all_days:
-                if day in selected_days:
-                    keyboard.append([InlineKeyboardButton(f"✅ {day.title()}", callback_data=f"edit_toggle_day:{day}")])
-                else:
-                    keyboard.append([InlineKeyboardButton(day.title(), callback_data=f"edit_toggle_day:{day}")])
-            
-            # Add action buttons
-            keyboard.append([InlineKeyboardButton("⏰ Set Time", callback_data="edit_set_recurring_time")])
-            keyboard.append([InlineKeyboardButton("Cancel", callback_data="edit_cancel")])
+            all_selected = day_mask == ALL_WEEKDAYS_MASK
             # Create selection text
             if all_selected:
                 selected_text = "All days"
             else:
-                selected_text = ", ".join([day.title() for day in selected_days]) if selected_days else "None"
+                selected_text = ", ".join(WEEKDAY_TITLES[day] for day in selected_days) if selected_days else "None"
             
             await query.edit_message_text(
                 f"Select weekdays for your recurring reminder (edit):\n(Click to toggle selection)\n\nSelected: {selected_text}",
-                reply_markup=InlineKeyboardMarkup(keyboard)
+                reply_markup=weekday_keyboard_markup(selected_days, edit=True)
             )
             return
         else:
             # Show calendar for date selection (one-time reminder)
             today = datetime.now()
             keyboard = create_calendar_keyboard(today.year, today.month)
-            await query.edit_message_text("Edit cancelled.")
+            await edit_message_once(query, "Edit cancelled.")
             await context.bot.send_message(
                 chat_id=query.message.chat.id,
                 text="Select a date for your reminder:",
                 reply_markup=keyboard,
-                message_thread_id=query.message.message_thread_id if hasattr(query.message, 'message_thread_id') and query.message.message_thread_id else None
+                message_thread_id=getattr(query.message, 'message_thread_id', None) or None
             )
             return SELECTING_DATE
     
 
     
     elif query.data == "edit_cancel":
-        if user_id in user_edit_context:
-            del user_edit_context[user_id]
-        await query.edit_message_text("Edit cancelled.")
+        context.user_data.pop("edit", None)
+        await edit_message_once(query, "Edit cancelled.")
         return
 
 async def handle_edit_text_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle text input during editing"""
     user_id = update.effective_user.id
     
-    if user_id not in user_edit_context:
+    edit_context = context.user_data.get("edit")
+    if edit_context is None:
         return
     
-    edit_context = user_edit_context[user_id]
-    field_to_edit = edit_context.get("field_to_edit")
+    field_to_edit = edit_context.field_to_edit
     text = update.message.text
     
     if field_to_edit == "message":
         # Update the message
-        reminder_id = edit_context["reminder_id"]
+        reminder_id = edit_context.reminder_id
         if db.update_reminder(reminder_id, user_id, message=text):
             await update.message.reply_text(f"✅ Reminder {reminder_id} message updated to: {text}")
         else:
             await update.message.reply_text("❌ Failed to update reminder.")
         
         # Clear edit context
-        del user_edit_context[user_id]
+        context.user_data.pop("edit", None)
         return
 
 async def handle_edit_date_selection(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -2915,12 +2539,12 @@ async def handle_edit_date_selection(update: Update, context: ContextTypes.DEFAU
     await query.answer()
     
     if query.data.startswith("select_date:"):
-        selected_date = query.data.split(":", 1)[1]
-        user_id = query.from_user.id
+        selected_date = query.data.partition(":")[2]
         
-        if user_id in user_edit_context:
-            user_edit_context[user_id]["selected_date"] = selected_date
-            user_edit_context[user_id]["step"] = "waiting_for_edit_time"
+        edit_context = context.user_data.get("edit")
+        if edit_context:
+            edit_context.selected_date = selected_date
+            edit_context.step = STEP_EDIT_WAITING_FOR_TIME
             
             await query.edit_message_text(
                 f"Date selected: {selected_date}\n\nPlease send the new time in HH:MM format (e.g., 14:30 or 2:30 PM):"
@@ -2929,7 +2553,7 @@ async def handle_edit_date_selection(update: Update, context: ContextTypes.DEFAU
     
     elif query.data.startswith("calendar:"):
         # Handle calendar navigation
-        year_month = query.data.split(":", 1)[1]
+        year_month = query.data.partition(":")[2]
         year, month = map(int, year_month.split("-"))
         keyboard = create_calendar_keyboard(year, month)
         await query.edit_message_reply_markup(reply_markup=keyboard)
@@ -2939,19 +2563,20 @@ async def handle_edit_time_input(update: Update, context: ContextTypes.DEFAULT_T
     """Handle time input during editing"""
     user_id = update.effective_user.id
     
-    if user_id not in user_edit_context:
+    edit_context = context.user_data.get("edit")
+    if edit_context is None:
         return
     
-    edit_context = user_edit_context[user_id]
-    step = edit_context.get("step")
+    step = edit_context.step
     text = update.message.text
     
-    if step == "waiting_for_edit_time":
+    if step == STEP_EDIT_WAITING_FOR_TIME:
         try:
-            parsed_time = parse_date(text, settings={'PREFER_DATES_FROM': 'future'})
-            if parsed_time:
-                time_str = parsed_time.strftime("%H:%M")
-                selected_date = edit_context["selected_date"]
+            parsed = parse_user_time(text)
+            if parsed:
+                hour, minute = parsed
+                time_str = f"{hour:02d}:{minute:02d}"
+                selected_date = edit_context.selected_date
                 
                 # Combine date and time
                 datetime_str = f"{selected_date} {time_str}"
@@ -2960,30 +2585,24 @@ async def handle_edit_time_input(update: Update, context: ContextTypes.DEFAULT_T
                 chat = update.effective_chat
                 tz_str = get_user_timezone(user_id, chat.type, chat.id)
                 
-                try:
-                    tz = pytz.timezone(tz_str)
-                except Exception:
-                    tz = pytz.UTC
+                tz = get_tz(tz_str)
                 
                 # Parse the combined datetime
-                reminder_time = parse_date(datetime_str, settings={'PREFER_DATES_FROM': 'future', 'TIMEZONE': tz_str, 'RETURN_AS_TIMEZONE_AWARE': True})
+                reminder_time = parse_local_datetime(datetime_str, tz_str)
                 
                 if not reminder_time:
                     await update.message.reply_text("Invalid date/time combination. Please try again.")
-                    del user_edit_context[user_id]
+                    context.user_data.pop("edit", None)
                     return
                 
-                if reminder_time.tzinfo is None:
-                    reminder_time = tz.localize(reminder_time)
-                
                 now = datetime.now(tz)
                 if reminder_time < now:
                     await update.message.reply_text("The time is in the past. Please try again.")
-                    del user_edit_context[user_id]
+                    context.user_data.pop("edit", None)
                     return
                 
                 # Update the reminder time in database
-                reminder_id = edit_context["reminder_id"]
+                reminder_id = edit_context.reminder_id
                 if db.update_reminder(reminder_id, user_id, remind_time=reminder_time.isoformat()):
                     # Remove old scheduled job and add new one
                     # Note: In a production system, you'd want to store job IDs and remove them properly
@@ -2992,7 +2611,7 @@ async def handle_edit_time_input(update: Update, context: ContextTypes.DEFAULT_T
                         schedule_reminder, 
                         'date', 
                         run_date=reminder_time, 
-                        args=[context.application, chat.id, edit_context["current_reminder"][1], reminder_time, reminder_id]
+                        args=[chat.id, edit_context.current_reminder[1], reminder_time, reminder_id]
                     )
                     
                     await update.message.reply_text(
@@ -3002,12 +2621,12 @@ async def handle_edit_time_input(update: Update, context: ContextTypes.DEFAULT_T
                     await update.message.reply_text("❌ Failed to update reminder.")
                 
                 # Clear edit context
-                del user_edit_context[user_id]
+                context.user_data.pop("edit", None)
                 return
             else:
                 await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
         except Exception as e:
-            logging.error(f"Error parsing time: {e}")
+            logger.error("Error parsing time: %s", e)
             await update.message.reply_text("Invalid time format. Please use HH:MM or 2:30 PM format:")
 
 async def check_admin_permissions(update: Update, context: ContextTypes.DEFAULT_TYPE) -> bool:
@@ -3020,14 +2639,14 @@ async def check_admin_permissions(update: Update, context: ContextTypes.DEFAULT_
         return True
     
     # For groups/supergroups, check admin status
-    if chat.type not in ["group", "supergroup"]:
+    if chat.type not in GROUP_CHAT_TYPES:
         return False
     
     try:
         chat_member = await context.bot.get_chat_member(chat.id, user_id)
         return chat_member.status in ['administrator', 'creator']
     except Exception as e:
-        logging.error(f"Failed to check admin status for user {user_id} in chat {chat.id}: {e}")
+        logger.error("Failed to check admin status for user %s in chat %s: %s", user_id, chat.id, e)
         return False
 
 async def admin_list_reminders(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -3044,14 +2663,7 @@ async def admin_list_reminders(update: Update, context: ContextTypes.DEFAULT_TYP
         )
         return
     
-    if not await check_admin_permissions(update, context):
-        await update.message.reply_text(
-            "❌ Admin Only Command\n\n"
-            "Only administrators can use this command."
-        )
-        return
-    
-    # Handle private chat differently
+    # Handle private chat differently (check_admin_permissions lets everyone through here)
     if update.effective_chat.type == "private":
         await update.message.reply_text(
             "📋 Your Reminders\n\n"
@@ -3064,25 +2676,35 @@ async def admin_list_reminders(update: Update, context: ContextTypes.DEFAULT_TYP
         return
     
     chat_id = update.effective_chat.id
-    topic_id, topic_name = await get_topic_info(update, context)
+    topic_id, topic_name = get_topic_info(update, context)
     
     # Check if user wants to see all topics or just current topic
     show_all_topics = context.args and context.args[0].lower() == 'all'
     
     if show_all_topics:
         # Get reminders for all topics in the chat
-        reminders = db.get_all_group_reminders(chat_id)
+        fetch_reminders = functools.partial(db.get_all_group_reminders, chat_id)
+    elif topic_id is None or topic_id == 1:
+        # In the general topic (topic_id is None or 1), get only general topic reminders
+        fetch_reminders = functools.partial(db.get_general_topic_reminders, chat_id)
+    else:
+        # Otherwise, get reminders for specific topic
+        fetch_reminders = functools.partial(db.get_all_group_reminders, chat_id, topic_id)
+    
+    # Only admins get to run the group-wide query; it then runs off the event loop
+    if not await check_admin_permissions(update, context):
+        await update.message.reply_text(
+            "❌ Admin Only Command\n\n"
+            "Only administrators can use this command."
+        )
+        return
+    reminders = await asyncio.to_thread(fetch_reminders)
+    
+    if show_all_topics:
         if not reminders:
             await update.message.reply_text("No reminders found in this group.")
             return
     else:
-        # If we're in general topic (topic_id is None or 1), get only general topic reminders
-        # Otherwise, get reminders for specific topic
-        if topic_id is None or topic_id == 1:
-            reminders = db.get_general_topic_reminders(chat_id)  # Only general topic reminders
-        else:
-            reminders = db.get_all_group_reminders(chat_id, topic_id)  # Specific topic
-        
         if not reminders:
             # Fix the error message logic
             if topic_id is None or topic_id == 1:
@@ -3094,43 +2716,43 @@ async def admin_list_reminders(update: Update, context: ContextTypes.DEFAULT_TYP
     
     # Format reminders with user info
     if topic_id is None or topic_id == 1:
-        message = "📋 Group Reminders (General Topic)\n\n"
+        parts = ["📋 Group Reminders (General Topic)\n\n"]
     else:
-        message = f"📋 Group Reminders{topic_name}\n\n"
-    message += "💡 Admin Actions:\n"
-    message += "• Click 🗑️ Delete to select a reminder to delete\n"
-    message += "• Use /admindelete <id> for direct deletion\n\n"
-    
-    for reminder in reminders[:20]:  # Limit to 20 reminders
-        reminder_id, user_id, message_text, remind_time, timezone, is_recurring, recurrence_type, day_of_week, topic_id = reminder
-        
-        # Get user info
-        try:
-            user = await context.bot.get_chat_member(chat_id, user_id)
-            user_name = user.user.first_name or user.user.username or f"User {user_id}"
-        except:
-            user_name = f"User {user_id}"
+        parts = [f"📋 Group Reminders{topic_name}\n\n"]
+    parts.append(
+        "💡 Admin Actions:\n"
+        "• Click 🗑️ Delete to select a reminder to delete\n"
+        "• Use /admindelete <id> for direct deletion\n\n"
+    )
+    
+    reminders = reminders[:20]  # Limit to 20 reminders
+    user_names = await resolve_user_names(context.bot, chat_id, [reminder[1] for reminder in reminders])
+    for reminder in reminders:
+        reminder_id, user_id, message_text, remind_time, timezone, is_recurring, recurrence_type, day_of_week, reminder_topic_id = reminder
+        user_name = user_names[user_id]
         
         # Format time
         try:
-            tz = pytz.timezone(timezone)
             if is_recurring:
                 time_display = remind_time  # HH:MM format
             else:
-                reminder_datetime = dateutil.parser.isoparse(remind_time)
+                reminder_datetime = stored_datetime(remind_time)
                 time_display = reminder_datetime.strftime("%Y-%m-%d %H:%M")
         except:
             time_display = remind_time
         
         # Add topic info if we're in general topic
         if topic_id is None or topic_id == 1:
-            topic_info = f" (Topic {reminder[8]})" if reminder[8] else " (General)"
-            message += f"{reminder_id} - {user_name}{topic_info}\n"
+            topic_info = f" (Topic {reminder_topic_id})" if reminder_topic_id else " (General)"
+            parts.append(f"{reminder_id} - {user_name}{topic_info}\n")
         else:
-            message += f"{reminder_id} - {user_name}\n"
+            parts.append(f"{reminder_id} - {user_name}\n")
         
-        message += f"⏰ {time_display} | 🔄 {'Yes' if is_recurring else 'No'}\n"
-        message += f"💬 {message_text[:50]}{'...' if len(message_text) > 50 else ''}\n\n"
+        parts.append(
+            f"⏰ {time_display} | 🔄 {'Yes' if is_recurring else 'No'}\n"
+            f"💬 {message_text[:50]}{'...' if len(message_text) > 50 else ''}\n\n"
+        )
+    message = "".join(parts)
     
     # Add action buttons with topic context
     if topic_id is None or topic_id == 1:
@@ -3192,35 +2814,106 @@ async def admin_delete_reminder(update: Update, context: ContextTypes.DEFAULT_TY
         await update.message.reply_text("Invalid reminder ID. Please provide a number.")
         return
     
-    # Get reminder details
-    reminder = db.get_reminder_by_id_admin(reminder_id, update.effective_chat.id)
-    if not reminder:
+    # Delete the reminder; the delete hands back its job IDs
+    job_ids = await asyncio.to_thread(db.admin_delete_reminder, reminder_id, update.effective_chat.id)
+    if job_ids is None:
         await update.message.reply_text("❌ Reminder not found.")
         return
     
-    # Get the job IDs before deleting
-    job_ids = db.get_reminder_job_ids(reminder_id)
+    invalidate_user_reminders(update.effective_chat.id)
+    # Remove from scheduler in one batch
+    await reschedule_jobs(job_ids, [])
     
-    # Delete the reminder
-    if db.admin_delete_reminder(reminder_id, update.effective_chat.id):
-        # Remove from scheduler
-        for job_id in job_ids:
-            try:
-                scheduler.remove_job(job_id)
-                logging.info(f"Removed job {job_id} for deleted reminder {reminder_id}")
-            except Exception as e:
-                logging.warning(f"Failed to remove job {job_id} for deleted reminder {reminder_id}: {e}")
-        
-        await update.message.reply_text(f"✅ Reminder {reminder_id} has been deleted by admin.")
-    else:
-        await update.message.reply_text("❌ Failed to delete reminder.")
+    await update.message.reply_text(f"✅ Reminder {reminder_id} has been deleted by admin.")
+
+
+
+# Per-user flow sessions in user_data expire after FLOW_TTL seconds without an update
+FLOW_KEYS = ("reminder", "edit", "note")
+FLOW_TTL = 3600
+FLOW_SWEEP_INTERVAL = 300
+user_last_seen = OrderedDict()  # user_id -> monotonic time of the last update, oldest first
+flow_sweeper_task = None
 
+def touch_user(update):
+    """Mark the update's user as active so their flow sessions are kept"""
+    user = update.effective_user if isinstance(update, Update) else None
+    if user is not None:
+        user_last_seen[user.id] = time.monotonic()
+        user_last_seen.move_to_end(user.id)
 
+def expire_flow_sessions(application):
+    """Drop flow sessions of users idle for longer than FLOW_TTL"""
+    cutoff = time.monotonic() - FLOW_TTL
+    while user_last_seen:
+        user_id, last_seen = next(iter(user_last_seen.items()))
+        if last_seen > cutoff:
+            break
+        user_last_seen.popitem(last=False)
+        user_data = application.user_data.get(user_id)
+        if user_data:
+            for key in FLOW_KEYS:
+                user_data.pop(key, None)
+
+async def flow_sweeper(application):
+    """Periodically expire abandoned reminder, edit and note sessions"""
+    while True:
+        await asyncio.sleep(FLOW_SWEEP_INTERVAL)
+        expire_flow_sessions(application)
+        # Every cached picker row is far past REMINDERS_CACHE_TTL by now
+        reminders_cache.clear()
+        expire_user_names()
+
+class PerChatUpdateProcessor(BaseUpdateProcessor):
+    """Process updates from different chats concurrently, but one at a time within a chat"""
+
+    def __init__(self, max_concurrent_updates):
+        super().__init__(max_concurrent_updates)
+        self.chat_locks = {}  # chat_id -> [lock, number of updates holding or awaiting it]
+
+    async def do_process_update(self, update, coroutine):
+        touch_user(update)
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await coroutine
+            return
+        entry = self.chat_locks.setdefault(chat.id, [asyncio.Lock(), 0])
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                await coroutine
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self.chat_locks[chat.id]
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+async def post_init(application: Application):
+    """Start the scheduler on the running event loop and restore pending reminders"""
+    global scheduler_worker_task, flow_sweeper_task
+    scheduler.start()
+    loop = asyncio.get_running_loop()
+    scheduler_worker_task = loop.create_task(scheduler_worker())
+    flow_sweeper_task = loop.create_task(flow_sweeper(application))
+    # Reschedule pending reminders from DB
+    load_and_reschedule_pending_reminders(application)
+
+async def post_shutdown(application: Application):
+    """Stop the scheduler without waiting for running reminder jobs"""
+    for task in (scheduler_worker_task, flow_sweeper_task, *chat_send_tasks):
+        if task is not None:
+            task.cancel()
+    if scheduler.running:
+        scheduler.shutdown(wait=False)
 
 if __name__ == "__main__":
-    import asyncio
-    import dateutil.parser
-    from telegram.error import TimedOut, NetworkError
+    import notes_bot
+    from telegram.error import NetworkError
     
     # Configure application with better timeout settings
     app = (ApplicationBuilder()
@@ -3228,15 +2921,22 @@ if __name__ == "__main__":
            .get_updates_read_timeout(30)
            .get_updates_write_timeout(30)
            .get_updates_connect_timeout(30)
+           .connect_timeout(10.0)
+           .pool_timeout(30.0)
+           .concurrent_updates(PerChatUpdateProcessor(CONCURRENT_UPDATES))
+           .post_init(post_init)
+           .post_shutdown(post_shutdown)
            .build())
-    main_event_loop = asyncio.get_event_loop()
     main_application = app
     
+    # Create tables before polling; timezone preferences are loaded lazily per user/chat
+    db.init_db()
+    
     # Add error handler for network issues
     async def error_handler(update, context):
         """Handle network errors gracefully"""
         if isinstance(context.error, (TimedOut, NetworkError)):
-            logging.warning(f"Network error: {context.error}")
+            logger.warning("Network error: %s", context.error)
             # Try to send a message to the user if possible
             if update and update.effective_chat:
                 try:
@@ -3244,7 +2944,7 @@ if __name__ == "__main__":
                 except:
                     pass
         else:
-            logging.error(f"Unhandled error: {context.error}")
+            logger.error("Unhandled error: %s", context.error)
     
     app.add_error_handler(error_handler)
     
@@ -3260,19 +2960,13 @@ if __name__ == "__main__":
     app.add_handler(CommandHandler("adminlist", admin_list_reminders))
     app.add_handler(CommandHandler("admindelete", admin_delete_reminder))
     
-    # Note-taking commands
-    note_handlers = notes_bot.get_note_handlers()
-    for handler in note_handlers:
-        app.add_handler(handler)
+    # Note-taking commands and buttons share this Application
+    notes_bot.register_handlers(app)
     
-    # Separate button handlers for notes and reminders
-    app.add_handler(CallbackQueryHandler(notes_bot.note_button_handler, pattern="^(note_help|cancel_edit_note|close_notes|back_to_notes|view_note:|edit_note:|delete_note:|edit_note_start:|delete_note_start:|edit_note_title:)"))
-    app.add_handler(CallbackQueryHandler(reminder_button, pattern="^(remind_type:|select_date:|select_all_days|toggle_day:|edit_toggle_day:|set_recurring_time|recurring_cancel|one_time_cancel|edit_reminder_start:|delete_reminder_start:|edit_reminder:|delete_reminder:|admin_delete_start:|admin_delete_reminder:|admin_delete_cancel|admin_close|close_list|calendar:|setoffset:|timezone_cancel|edit_message|edit_time|edit_cancel|delete_cancel|edit_select_all_days|edit_set_recurring_time|edit_toggle_day:)"))
+    # Reminder buttons
+    app.add_handler(CallbackQueryHandler(reminder_button, pattern="^(remind_type:|select_date:|select_all_days|toggle_day:|edit_toggle_day:|set_recurring_time|recurring_cancel|one_time_cancel|edit_reminder_start:|delete_reminder_start:|edit_reminder:|delete_reminder:|admin_delete_start:|admin_delete_reminder:|admin_delete_cancel|admin_close|close_list|list_page:|calendar:|setoffset:|timezone_cancel|edit_message|edit_time|edit_cancel|delete_cancel|edit_select_all_days|edit_set_recurring_time|edit_toggle_day:)"))
     
     app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_reminder_text_input))
     
-    # Reschedule pending reminders from DB
-    load_and_reschedule_pending_reminders(app)
-    
     # Run the bot
     app.run_polling() 
\ No newline at end of file
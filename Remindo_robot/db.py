@@ -1,9 +1,21 @@
 import psycopg2
 import psycopg2.extras
 from datetime import datetime
+import functools
 import logging
 import config
 
+@functools.lru_cache(maxsize=1024)
+def get_pytz_timezone(name):
+    """Cached pytz timezone lookup; unknown or empty names fall back to UTC"""
+    import pytz
+    if not name or name == 'UTC':
+        return pytz.UTC
+    try:
+        return pytz.timezone(name)
+    except pytz.UnknownTimeZoneError:
+        return pytz.UTC
+
 def get_connection():
     """Get a PostgreSQL database connection"""
     try:
@@ -114,16 +126,8 @@ def add_reminder(user_id, chat_id, message, remind_time, timezone, is_recurring=
                     today = date.today()
                     remind_datetime = datetime.combine(today, time_obj)
                     
-                    # Convert to timezone-aware datetime
-                    if timezone and timezone != 'UTC':
-                        try:
-                            tz = pytz.timezone(timezone)
-                            remind_datetime = tz.localize(remind_datetime)
-                        except:
-                            # Fallback to UTC if timezone is invalid
-                            remind_datetime = pytz.UTC.localize(remind_datetime)
-                    else:
-                        remind_datetime = pytz.UTC.localize(remind_datetime)
+                    # Convert to timezone-aware datetime (UTC if the timezone is invalid)
+                    remind_datetime = get_pytz_timezone(timezone).localize(remind_datetime)
                     
                     remind_time = remind_datetime.isoformat()
                 except Exception as e:
@@ -185,6 +189,33 @@ def get_user_reminders(user_id, chat_id, topic_id=None):
                 ''', (user_id, chat_id))
             return c.fetchall()
 
+def get_user_reminders_formatted(user_id, chat_id, topic_id=None, general_only=False, limit=None, offset=0):
+    """Active reminders for /list with their times already rendered in each reminder's own timezone.
+
+    Rows are (id, message, 'HH:MM', 'YYYY-MM-DD HH:MM', is_recurring, recurrence_type, day_of_week, topic_id, total),
+    where total counts every matching reminder, not just the page returned by limit/offset.
+    topic_id limits the rows to one topic and general_only to the general topic; with neither, all topics are returned.
+    """
+    if general_only:
+        topic_filter, params = 'AND topic_id IS NULL', (user_id, chat_id)
+    elif topic_id is not None:
+        topic_filter, params = 'AND topic_id = %s', (user_id, chat_id, topic_id)
+    else:
+        topic_filter, params = '', (user_id, chat_id)
+    with get_connection() as conn:
+        with conn.cursor() as c:
+            c.execute(f'''
+                SELECT id, message,
+                       to_char(remind_time AT TIME ZONE timezone, 'HH24:MI'),
+                       to_char(remind_time AT TIME ZONE timezone, 'YYYY-MM-DD HH24:MI'),
+                       is_recurring, recurrence_type, day_of_week, topic_id, COUNT(*) OVER ()
+                FROM reminders 
+                WHERE user_id = %s AND chat_id = %s {topic_filter} AND (is_sent = FALSE OR is_recurring = TRUE)
+                ORDER BY remind_time ASC, id ASC
+                LIMIT %s OFFSET %s
+            ''', params + (limit, offset))
+            return c.fetchall()
+
 def get_user_general_topic_reminders(user_id, chat_id):
     """Get only reminders from general topic (topic_id IS NULL) for a user"""
     with get_connection() as conn:
@@ -216,16 +247,22 @@ def get_topic_name(chat_id, topic_id):
         return "General"
     return f"Topic {topic_id}"
 
+def split_job_ids(job_id):
+    """Scheduler job IDs stored in a reminder's job_id column (comma-separated for legacy per-day jobs)"""
+    return job_id.split(',') if job_id else []
+
 def delete_reminder(reminder_id, user_id):
-    """Delete a reminder by ID, ensuring it belongs to the user"""
+    """Delete a reminder by ID, ensuring it belongs to the user; returns its job IDs, or None if nothing was deleted"""
     with get_connection() as conn:
         with conn.cursor() as c:
             c.execute('''
                 DELETE FROM reminders 
                 WHERE id = %s AND user_id = %s
+                RETURNING job_id
             ''', (reminder_id, user_id))
+            result = c.fetchone()
             conn.commit()
-            return c.rowcount > 0
+            return split_job_ids(result[0]) if result else None
 
 def update_reminder(reminder_id, user_id, message=None, remind_time=None, timezone=None, job_id=None, recurrence_type=None, day_of_week=None):
     """Update a reminder's fields"""
@@ -249,7 +286,6 @@ def update_reminder(reminder_id, user_id, message=None, remind_time=None, timezo
                     # For recurring reminders, convert time string to proper timestamp
                     if isinstance(remind_time, str) and ':' in remind_time and len(remind_time) <= 8:
                         from datetime import datetime, date
-                        import pytz
                         
                         try:
                             # Parse the time
@@ -264,15 +300,7 @@ def update_reminder(reminder_id, user_id, message=None, remind_time=None, timezo
                             
                             # Convert to timezone-aware datetime
                             reminder_timezone = reminder_info[1] if reminder_info[1] else timezone
-                            if reminder_timezone and reminder_timezone != 'UTC':
-                                try:
-                                    tz = pytz.timezone(reminder_timezone)
-                                    remind_datetime = tz.localize(remind_datetime)
-                                except:
-                                    # Fallback to UTC if timezone is invalid
-                                    remind_datetime = pytz.UTC.localize(remind_datetime)
-                            else:
-                                remind_datetime = pytz.UTC.localize(remind_datetime)
+                            remind_datetime = get_pytz_timezone(reminder_timezone).localize(remind_datetime)
                             
                             remind_time = remind_datetime.isoformat()
                         except Exception as e:
@@ -311,6 +339,19 @@ def update_reminder(reminder_id, user_id, message=None, remind_time=None, timezo
             conn.commit()
             return c.rowcount > 0
 
+def bulk_update_reminder_job_ids(updates):
+    """Set the job ID of many reminders in one transaction; updates holds (reminder_id, user_id, job_id) tuples"""
+    if not updates:
+        return
+    with get_connection() as conn:
+        with conn.cursor() as c:
+            psycopg2.extras.execute_batch(
+                c,
+                'UPDATE reminders SET job_id = %s, updated_at = NOW() WHERE id = %s AND user_id = %s',
+                [(job_id, reminder_id, user_id) for reminder_id, user_id, job_id in updates]
+            )
+            conn.commit()
+
 def get_reminder_job_id(reminder_id):
     """Get the job ID for a specific reminder"""
     with get_connection() as conn:
@@ -325,10 +366,7 @@ def get_reminder_job_ids(reminder_id):
         with conn.cursor() as c:
             c.execute('SELECT job_id FROM reminders WHERE id = %s', (reminder_id,))
             result = c.fetchone()
-            if result and result[0]:
-                # Split comma-separated job IDs
-                return result[0].split(',')
-            return []
+            return split_job_ids(result[0]) if result else []
 
 def save_timezone_preference(entity_id, entity_type, timezone):
     """Save timezone preference for a user or chat"""
@@ -409,14 +447,16 @@ def get_reminder_by_id_admin(reminder_id, chat_id):
             return c.fetchone()
 
 def admin_delete_reminder(reminder_id, chat_id):
-    """Delete a reminder by ID for admin (no user restriction)"""
+    """Delete a reminder by ID for admin (no user restriction); returns its job IDs, or None if nothing was deleted"""
     with get_connection() as conn:
         with conn.cursor() as c:
             c.execute('''
                 DELETE FROM reminders 
                 WHERE id = %s AND chat_id = %s
+                RETURNING job_id
             ''', (reminder_id, chat_id))
+            result = c.fetchone()
             conn.commit()
-            return c.rowcount > 0
+            return split_job_ids(result[0]) if result else None
 
  
\ No newline at end of file
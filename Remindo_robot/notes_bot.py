@@ -9,9 +9,6 @@ import re
 # Initialize database
 notes_db.init_notes_db()
 
-# Store user context for note editing
-user_note_context = {}
-
 # Configuration removed - using exact same logic as reminder system
 
 def create_shareable_message_link(chat_id, message_id, chat_username=None, topic_id=None):
@@ -464,7 +461,7 @@ async def editnote_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
     
     # Store note info in user context
-    user_note_context[user_id] = {
+    context.user_data["note"] = {
         "note_id": note_id,
         "step": "editing_note",
         "note_data": note
@@ -604,8 +601,7 @@ async def note_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
     
     if data == "cancel_edit_note":
-        if user_id in user_note_context:
-            del user_note_context[user_id]
+        context.user_data.pop("note", None)
         await query.edit_message_text("❌ Note editing cancelled.")
         return
     
@@ -644,7 +640,7 @@ async def note_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
         note_id = int(data.split(":")[1])
         note = notes_db.get_note_by_id(note_id, user_id)
         if note:
-            user_note_context[user_id] = {
+            context.user_data["note"] = {
                 "note_id": note_id,
                 "step": "editing_note",
                 "note_data": note
@@ -712,8 +708,8 @@ async def note_button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE
     # Handle edit note title
     if data.startswith("edit_note_title:"):
         note_id = int(data.split(":")[1])
-        if user_id in user_note_context:
-            user_note_context[user_id]["step"] = "editing_title"
+        if "note" in context.user_data:
+            context.user_data["note"]["step"] = "editing_title"
             cancel_keyboard = InlineKeyboardMarkup([[
                 InlineKeyboardButton("❌ Cancel", callback_data="cancel_edit_note")
             ]])
@@ -730,10 +726,10 @@ async def handle_note_text_input(update: Update, context: ContextTypes.DEFAULT_T
     """Handle text input for note editing"""
     user_id = update.effective_user.id
     
-    if user_id not in user_note_context:
+    if "note" not in context.user_data:
         return
     
-    user_context = user_note_context[user_id]
+    user_context = context.user_data["note"]
     step = user_context.get("step")
     
     if step == "editing_title":
@@ -746,7 +742,7 @@ async def handle_note_text_input(update: Update, context: ContextTypes.DEFAULT_T
             await update.message.reply_text("❌ Failed to update title.")
         
         # Clear user context
-        del user_note_context[user_id]
+        context.user_data.pop("note", None)
 
 # Command handlers to be registered in main bot
 def get_note_handlers():
@@ -756,4 +752,10 @@ def get_note_handlers():
         CommandHandler("notes", notes_command),
         CommandHandler("deletenote", deletenote_command),
         CommandHandler("editnote", editnote_command)
-    ] 
\ No newline at end of file
+    ]
+
+def register_handlers(app):
+    """Attach note commands and note buttons to the shared bot Application"""
+    for handler in get_note_handlers():
+        app.add_handler(handler)
+    app.add_handler(CallbackQueryHandler(note_button_handler, pattern="^(note_help|cancel_edit_note|close_notes|back_to_notes|view_note:|edit_note:|delete_note:|edit_note_start:|delete_note_start:|edit_note_title:)"))
\ No newline at end of file